@@ -0,0 +1,162 @@
+import hashlib
+import os
+import pickle
+import sys
+import time
+
+from Instrument import profile
+from RateLimit import BACKOFF_S
+from RateLimit import RETRIES
+from RateLimit import is_transient
+from RateLimit import limiter
+
+HOUR_S = 60 * 60
+
+# How long a stored response of every CodeforcesAPI method stays fresh, in seconds
+TTL = {
+    'contest_list': 3 * HOUR_S,
+    'problemset_problems': 6 * HOUR_S,
+    'user_info': HOUR_S,
+    'user_rating': HOUR_S,
+    'user_status': 5 * 60,
+}
+
+CACHE_DIR = 'cache'
+MAX_BYTES = 512 * 1024 * 1024
+# A full cache is evicted down to this part of max_bytes, so the next scan is many writes away
+EVICT_TO = 0.9
+
+
+class OfflineCacheMiss(Exception):
+    pass
+
+
+def materialize(data):
+    # CodeforcesAPI answers with one-shot map objects, they can be neither stored nor reread
+    if isinstance(data, dict):
+        return {k: materialize(v) for k, v in data.items()}
+    if isinstance(data, (map, filter)):
+        return list(data)
+    return data
+
+
+def request_with_retries(name, f, args=(), throttle=True):
+    """(f(), seconds it took), repeating transient failures of request name with exponential backoff."""
+    for attempt in range(RETRIES + 1):
+        if throttle:
+            limiter.wait()
+        start = time.perf_counter()
+        try:
+            return f(), time.perf_counter() - start
+        except Exception as e:
+            profile.request(name, time.perf_counter() - start, error=True)
+            if attempt == RETRIES or not is_transient(e):
+                raise
+            print('Retrying', name, args, 'after:', e, file=sys.stderr)
+            profile.retry(name)
+            time.sleep(BACKOFF_S * 2 ** attempt)
+
+
+class CachedCodeforcesAPI:
+    """CodeforcesAPI that keeps every response on disk.
+
+    An entry is reused while it is younger than the TTL of its method. The cache
+    directory is bounded by max_bytes, least recently used entries are evicted
+    first. In offline mode nothing is requested and entries are served regardless
+    of their age, in resume mode entries of any age are served and only missing
+    ones are requested. Requests that do go to Codeforces share one rate limiter,
+    unless throttle is off.
+    """
+
+    def __init__(self, api, directory=CACHE_DIR, ttl=None, max_bytes=MAX_BYTES, offline=False, resume=False,
+                 throttle=True):
+        self.api = api
+        self.throttle = throttle
+        self.directory = directory
+        self.ttl = dict(TTL)
+        self.ttl.update(ttl or {})
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.resume = resume
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # Kept up to date by every write, the directory is only scanned again to evict
+        self.bytes = sum(size for _, size, _ in self.entries())
+
+    def __getattr__(self, name):
+        if name not in TTL:
+            return getattr(self.api, name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    @property
+    def live(self):
+        """Whether Codeforces may be asked directly, past this cache and any cassette."""
+        return not self.offline and getattr(self.api, 'live', True)
+
+    def path(self, name, args, kwargs):
+        key = repr((args, sorted(kwargs.items()))).encode()
+        return os.path.join(self.directory, '{}.{}.pickle'.format(name, hashlib.sha1(key).hexdigest()))
+
+    def call(self, name, *args, **kwargs):
+        path = self.path(name, args, kwargs)
+        now = time.time()
+
+        if os.path.exists(path) and (self.offline or self.resume or now - os.path.getmtime(path) < self.ttl[name]):
+            with open(path, 'rb') as f:
+                data = pickle.load(f)
+            # atime marks the last use for eviction, mtime keeps the download time for expiry
+            os.utime(path, (now, os.path.getmtime(path)))
+            self.hits += 1
+            profile.hit(name)
+            return data
+
+        if self.offline:
+            raise OfflineCacheMiss('{} {} {} is not cached'.format(name, args, kwargs))
+
+        self.misses += 1
+        data, elapsed = self.request(name, *args, **kwargs)
+        tmp = path + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(data, f, pickle.HIGHEST_PROTOCOL)
+        size = os.path.getsize(tmp)
+        profile.request(name, elapsed, size)
+        if os.path.exists(path):
+            self.bytes -= os.path.getsize(path)
+        os.replace(tmp, path)
+        self.bytes += size
+        if self.bytes > self.max_bytes:
+            self.evict()
+        return data
+
+    def uncached(self, name, *args, **kwargs):
+        """Answer of a request that is not stored, for data the caller keeps itself."""
+        if self.offline:
+            raise OfflineCacheMiss('{} {} {} is not cached'.format(name, args, kwargs))
+        data, elapsed = self.request(name, *args, **kwargs)
+        profile.request(name, elapsed)
+        return data
+
+    def request(self, name, *args, **kwargs):
+        return request_with_retries(name, lambda: materialize(getattr(self.api, name)(*args, **kwargs)), args,
+                                    self.throttle)
+
+    def entries(self):
+        res = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.pickle'):
+                st = os.stat(os.path.join(self.directory, name))
+                res.append((st.st_atime, st.st_size, name))
+        return res
+
+    def evict(self):
+        entries = self.entries()
+        self.bytes = sum(size for _, size, _ in entries)
+        for atime, size, name in sorted(entries):
+            if self.bytes <= self.max_bytes * EVICT_TO:
+                break
+            os.remove(os.path.join(self.directory, name))
+            self.bytes -= size
+
+    def report(self):
+        return 'Cache hits: {}, misses: {}'.format(self.hits, self.misses)
@@ -0,0 +1,45 @@
+import numpy as np
+
+
+def catalogue_ratings(catalogue, ids):
+    return np.frombuffer(catalogue.rating, dtype=np.int32)[ids]
+
+
+def difficulty_windows(catalogue, ids, ratings, c_easy, c_hard):
+    """Boolean matrix, row u marks the problems that fit the window of user u."""
+    rating = catalogue_ratings(catalogue, ids)
+    user_rating = np.asarray(ratings, dtype=np.float64)[:, None]
+    return (rating <= user_rating * c_hard) & (rating >= user_rating * c_easy)
+
+
+def hardest(catalogue, ids, mask, cnt):
+    """Columns of the cnt hardest marked problems of every row.
+
+    Equal ratings go to the earlier id, which is what a stable sort by rating
+    picked when users were handled one by one.
+    """
+    n = len(ids)
+    order = np.arange(n - 1, -1, -1, dtype=np.int64)
+    key = catalogue_ratings(catalogue, ids).astype(np.int64) * n + order
+    keys = np.where(mask, key, -1)
+    return np.argpartition(-keys, cnt - 1, axis=1)[:, :cnt]
+
+
+def select_problems(catalogue, ids, ratings, c_easy, c_hard, cnt):
+    """Problems assigned to every user, all users of a week at once.
+
+    ids are the candidate problems in increasing order, cnt == -1 keeps every
+    problem of the window.
+    """
+    if len(ids) == 0 or cnt == 0:
+        return [[] for _ in ratings]
+
+    ids = np.asarray(ids, dtype=np.int64)
+    mask = difficulty_windows(catalogue, ids, ratings, c_easy, c_hard)
+
+    if cnt == -1 or cnt >= len(ids):
+        return [ids[row].tolist() for row in mask]
+
+    top = hardest(catalogue, ids, mask, cnt)
+    picked = np.take_along_axis(mask, top, axis=1)
+    return [ids[columns[ok]].tolist() for columns, ok in zip(top, picked)]
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+import tracemalloc
+
+from Batch import select_problems
+from Catalogue import Catalogue
+from Catalogue import filter_difficult
+from Catalogue import filter_easy
+from Catalogue import filter_unsolved
+from Catalogue import filter_week
+from Dataset import Dataset
+from Instrument import peak_rss_kb
+from RatingStore import RatingStore
+from Report import write_file
+from Season import Season
+from Season import WEEK_S
+from SubmissionLog import SubmissionLog
+from Synthetic import START
+from Synthetic import SyntheticCodeforcesAPI
+from Temp import C_EASY
+from Temp import C_HARD
+from Temp import MAX_CNT
+from Temp import get_problems_for_user
+from Temp import print_list_of_problems_to_files
+from Upsolving import cnt_upsolving
+from Users import fetch_users
+from Warehouse import Warehouse
+
+# users x submissions per user
+SCALE_POINTS = '36x1000,36x10000,36x100000,500x1000,500x10000,5000x1000'
+CONTESTS = 1500
+OUTPUT = 'benchmark.json'
+TOLERANCE = 0.25
+# Differences below these never count as a regression, they are noise
+SLACK = {'wall_s': 0.05, 'alloc_peak_bytes': 1024 * 1024, 'max_rss_kb': 16 * 1024}
+
+
+def measure(results, api, stage, f, *args):
+    """Runs f(*args) as stage, the time api spent generating data is not counted."""
+    gc.collect()
+    if tracemalloc.is_tracing():
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+    generating = api.generating_s
+    start = time.perf_counter()
+    value = f(*args)
+    wall = time.perf_counter() - start - (api.generating_s - generating)
+
+    results[stage] = {'wall_s': wall, 'alloc_peak_bytes': None, 'alloc_net_bytes': None,
+                      'max_rss_kb': peak_rss_kb()}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        results[stage]['alloc_peak_bytes'] = peak - before
+        results[stage]['alloc_net_bytes'] = current - before
+    return value
+
+
+def run_point(users, submissions, contests, seed):
+    """Every stage of a weekly refresh for one generated cohort, from scratch."""
+    api = SyntheticCodeforcesAPI(users, contests, submissions, seed)
+    season = Season(START, (api.end - api.start) // WEEK_S)
+    week = season.weeks - 1
+    results = {}
+
+    with tempfile.TemporaryDirectory() as directory:
+        dataset = Dataset(api, log=SubmissionLog(api, os.path.join(directory, 'submissions')),
+                          store=RatingStore(api, os.path.join(directory, 'rating_history.pickle')),
+                          warehouse=Warehouse(os.path.join(directory, 'warehouse.sqlite')))
+
+        cohort = measure(results, api, 'user_info', fetch_users, api, api.handles)
+        measure(results, api, 'problemset', lambda: (dataset.problems(), dataset.problem_statistics(), dataset.contests()))
+        catalogue = measure(results, api, 'catalogue', Catalogue, dataset.problems(), dataset.problem_statistics(),
+                            api.rating_table(), dataset.contests())
+        measure(results, api, 'submissions', lambda: [dataset.submissions(user.handle) for user in cohort])
+        handle2rating = measure(results, api, 'ratings', dataset.ratings_at, cohort, season.bounds(week)[0])
+
+        id2contest = season.split(dataset.contests())[week]
+        problems = filter_week(catalogue, set(id2contest))
+        measure(results, api, 'weekly_filters', lambda: [
+            list(filter_easy(filter_difficult(filter_week(catalogue, set(id2contest)), catalogue,
+                                              handle2rating[user.handle] * C_HARD),
+                             catalogue, handle2rating[user.handle] * C_EASY)) for user in cohort])
+        windows = measure(results, api, 'select_problems', select_problems, catalogue, problems,
+                          [handle2rating[user.handle] for user in cohort], C_EASY, C_HARD, -1)
+
+        indexes = measure(results, api, 'run_index', lambda: [dataset.run_index(user.handle, catalogue) for user in cohort])
+        ends = dataset.contest_ends()
+        measure(results, api, 'cnt_upsolving', lambda: [
+            cnt_upsolving(index, window, catalogue, ends)
+            for index, window in zip(indexes, windows)])
+        measure(results, api, 'filter_unsolved', lambda: [
+            list(filter_unsolved(window, catalogue, index)) for index, window in zip(indexes, windows)])
+        candidates = measure(results, api, 'get_problems_for_user', lambda: {
+            user.handle: get_problems_for_user(dataset, user, window, catalogue)
+            for user, window in zip(cohort, windows)})
+        measure(results, api, 'report', print_list_of_problems_to_files, dataset, cohort, catalogue, windows,
+                candidates, os.path.join(directory, 'tmp.1.html'), MAX_CNT)
+
+        # What holding the histories as Submission objects would take, against the RunTables of 'submissions'
+        if tracemalloc.is_tracing():
+            measure(results, api, 'submission_objects', lambda: [list(api.runs(user.handle)) for user in cohort])
+        dataset.warehouse.close()
+
+    return results
+
+
+def run_isolated(point, args):
+    """Runs one scale point in a fresh interpreter, so its peak RSS is its own."""
+    command = [sys.executable, os.path.abspath(__file__), '--point', point,
+               '--contests', str(args.contests), '--seed', str(args.seed)]
+    if args.no_alloc:
+        command.append('--no-alloc')
+    out = subprocess.run(command, stdout=subprocess.PIPE, check=True).stdout
+    return json.loads(out)
+
+
+def regressions(results, baseline, tolerance):
+    found = []
+    for point, stages in results['points'].items():
+        for stage, metrics in stages.items():
+            old = baseline['points'].get(point, {}).get(stage)
+            if old is None:
+                continue
+            for metric, slack in SLACK.items():
+                if metrics[metric] is None or old.get(metric) is None:
+                    continue
+                if metrics[metric] > old[metric] * (1 + tolerance) + slack:
+                    found.append('{} {} {}: {:.6g} > {:.6g}'.format(point, stage, metric, metrics[metric], old[metric]))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Time the assignment pipeline on generated cohorts.')
+    parser.add_argument('--points', default=SCALE_POINTS, help='comma separated USERSxSUBMISSIONS scale points')
+    parser.add_argument('--contests', type=int, default=CONTESTS, help='contests in the generated problemset')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-alloc', action='store_true', help='do not trace allocations, which slows Python down')
+    parser.add_argument('--output', default=OUTPUT, help='where the measurements are written')
+    parser.add_argument('--baseline', help='fail when a measurement regresses past this earlier output')
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE, help='allowed relative regression')
+    parser.add_argument('--point', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.point:
+        if not args.no_alloc:
+            tracemalloc.start()
+        users, submissions = map(int, args.point.split('x'))
+        print(json.dumps(run_point(users, submissions, args.contests, args.seed)))
+        return
+
+    results = {'python': platform.python_version(), 'contests': args.contests, 'seed': args.seed,
+               'traced': not args.no_alloc, 'points': {}}
+    for point in args.points.split(','):
+        print('Running', point, file=sys.stderr)
+        results['points'][point] = run_isolated(point, args)
+        for stage, metrics in results['points'][point].items():
+            print('  {:24}{:10.3f} s{:12} KB'.format(stage, metrics['wall_s'], metrics['max_rss_kb']), file=sys.stderr)
+    write_file(args.output, json.dumps(results, indent=1))
+
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            found = regressions(results, json.load(f), args.tolerance)
+        for line in found:
+            print('Regression:', line, file=sys.stderr)
+        if found:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except SystemExit:
+        raise
+    except:
+        traceback.print_exc()
+        sys.exit(1)
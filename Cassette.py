@@ -0,0 +1,161 @@
+import argparse
+import atexit
+from collections import defaultdict
+from collections import deque
+import gzip
+import pickle
+import shutil
+import tempfile
+import time
+
+from codeforces import CodeforcesAPI
+from ApiCache import CachedCodeforcesAPI
+from ApiCache import TTL
+from ApiCache import materialize
+from RateLimit import CALL_LIMIT_EXCEEDED
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def request_key(name, args, kwargs):
+    return name, repr((args, sorted(kwargs.items())))
+
+
+def is_rejection(error):
+    return error is not None and CALL_LIMIT_EXCEEDED in str(error)
+
+
+def picklable(error):
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError('{}: {}'.format(type(error).__name__, error))
+
+
+class RecordingCodeforcesAPI:
+    """CodeforcesAPI that writes every request, its answer or error and its duration to a cassette.
+
+    The cassette is a gzip file of pickled entries, every entry is appended as
+    a gzip member of its own, so a run that dies still leaves a readable cassette.
+    """
+
+    # What is asked past the cassette, like the rating snapshot, would be missing from its replay
+    live = False
+
+    def __init__(self, api, file):
+        self.api = api
+        self.file = file
+        with gzip.open(file, 'wb'):
+            pass
+
+    def __getattr__(self, name):
+        if name not in TTL:
+            return getattr(self.api, name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def call(self, name, *args, **kwargs):
+        data, error = None, None
+        start = time.perf_counter()
+        try:
+            data = materialize(getattr(self.api, name)(*args, **kwargs))
+        except Exception as e:
+            error = e
+        elapsed = time.perf_counter() - start
+
+        with gzip.open(self.file, 'ab') as f:
+            pickle.dump({'name': name, 'args': args, 'kwargs': kwargs, 'elapsed': elapsed,
+                         'data': data, 'error': picklable(error) if error is not None else None},
+                        f, pickle.HIGHEST_PROTOCOL)
+        if error is not None:
+            raise error
+        return data
+
+
+def read_cassette(file):
+    entries = []
+    with gzip.open(file, 'rb') as f:
+        while True:
+            try:
+                entries.append(pickle.load(f))
+            except EOFError:
+                return entries
+
+
+class ReplayCodeforcesAPI:
+    """Answers requests from a cassette without any network.
+
+    Repeated requests get the recorded answers in the order they were recorded,
+    after the last one that answer keeps being served. Recorded errors are
+    raised again, except the rate-limit rejections, which are skipped unless
+    rejections is set. With latency set every answer takes as long as it did.
+    """
+
+    live = False
+
+    def __init__(self, file, latency=False, rejections=False):
+        self.latency = latency
+        self.rejections = rejections
+        self.entries = defaultdict(deque)
+        self.replayed = 0
+        for entry in read_cassette(file):
+            if is_rejection(entry['error']) and not rejections:
+                continue
+            self.entries[request_key(entry['name'], entry['args'], entry['kwargs'])].append(entry)
+
+    def __getattr__(self, name):
+        if name not in TTL:
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.call(name, *args, **kwargs)
+
+    def call(self, name, *args, **kwargs):
+        entries = self.entries.get(request_key(name, args, kwargs))
+        if not entries:
+            raise CassetteMiss('{} {} {} is not in the cassette'.format(name, args, kwargs))
+        entry = entries.popleft() if len(entries) > 1 else entries[0]
+
+        self.replayed += 1
+        if self.latency:
+            time.sleep(entry['elapsed'])
+        if entry['error'] is not None:
+            raise entry['error']
+        return entry['data']
+
+
+def add_transport_arguments(parser):
+    parser.add_argument('--record', metavar='CASSETTE', help='record every Codeforces request into a cassette')
+    parser.add_argument('--replay', metavar='CASSETTE', help='answer Codeforces requests from a cassette')
+    parser.add_argument('--latency', action='store_true', help='replay with the recorded response times')
+    parser.add_argument('--rejections', action='store_true', help='replay the recorded rate-limit rejections')
+
+
+def open_api(args):
+    """CodeforcesAPI as the command line asks: live, recorded or replayed."""
+    if args.replay:
+        return ReplayCodeforcesAPI(args.replay, args.latency, args.rejections)
+    if args.record:
+        return RecordingCodeforcesAPI(CodeforcesAPI(), args.record)
+    return CodeforcesAPI()
+
+
+def open_cached_api(args, offline=False, resume=False):
+    """CachedCodeforcesAPI over open_api(args).
+
+    A recorded or replayed run gets an empty cache of its own: the live cache
+    would answer requests the cassette then misses, and would keep replayed
+    responses as fresh ones. Replayed requests are not rate limited.
+    """
+    if not args.record and not args.replay:
+        return CachedCodeforcesAPI(open_api(args), offline=offline, resume=resume)
+    directory = tempfile.mkdtemp(prefix='cassette-cache-')
+    atexit.register(shutil.rmtree, directory, True)
+    return CachedCodeforcesAPI(open_api(args), directory, offline=offline, resume=resume,
+                               throttle=not args.replay)
+
+
+def cached_transport(argv, offline=False, resume=False):
+    parser = argparse.ArgumentParser(add_help=False)
+    add_transport_arguments(parser)
+    return open_cached_api(parser.parse_known_args(argv)[0], offline, resume)
@@ -0,0 +1,174 @@
+from array import array
+from collections import defaultdict
+import os
+import re
+
+NO_RATING = 0
+
+# Div. 1 and Div. 2 rounds held together get ids this close to each other and start at most
+# TWIN_START_DISTANCE_S apart
+TWIN_CONTEST_DISTANCE = 10
+TWIN_START_DISTANCE_S = 60 * 60
+TWINS = 'twins.txt'
+
+
+def parse_problem(name):
+    """(1257, 'C') for "1257C"."""
+    match = re.fullmatch(r'(\d+)([A-Za-z]\w*)', name)
+    if match is None:
+        raise ValueError('{} is not a problem like 1257C'.format(name))
+    return int(match.group(1)), match.group(2)
+
+
+def read_twins(file=TWINS):
+    """Manual twin overrides: "1256E 1257C" per line joins problems into one class, "! 1257C 1257D" keeps
+    the listed problems out of every class found by name. Text after # is a comment."""
+    joined, separate = [], []
+    with open(file, 'r') as f:
+        for line in f:
+            s = line.split('#')[0].split()
+            if s and s[0] == '!':
+                separate.extend(parse_problem(name) for name in s[1:])
+            elif len(s) > 1:
+                joined.append([parse_problem(name) for name in s])
+    return joined, separate
+
+
+def load_twins(file=TWINS):
+    return read_twins(file) if os.path.exists(file) else None
+
+
+class Catalogue:
+    """Problemset interned to dense integer ids.
+
+    Problem i is described by the i-th element of parallel arrays, so the
+    filters below work on plain ints and never build keys or Problem objects.
+    Ids follow the order of the problemset, sorting by id keeps the order the
+    old Problem lists had.
+
+    twin[i] is the class of problem i: the smallest id among the problems that
+    are the same task in the Div. 1 and Div. 2 rounds of one event, which have
+    the same name, close contest ids and, when contests are given, the same
+    start. twins are the manual overrides read by read_twins.
+    """
+
+    def __init__(self, problems, statistics, ratings, contests=None, twins=None):
+        self.problems = []
+        self.keys = []
+        self.contest_id = array('i')
+        self.index = []
+        self.rating = array('i')
+        self.solved_count = array('i')
+        self.tags = []
+        self.ids = {}
+        self.by_contest = defaultdict(list)
+
+        for problem in problems:
+            key = (problem.contest_id, problem.index)
+            if key in self.ids:
+                continue
+            i = len(self.problems)
+            self.ids[key] = i
+            self.problems.append(problem)
+            self.keys.append(key)
+            self.contest_id.append(problem.contest_id or 0)
+            self.index.append(problem.index)
+            self.rating.append(ratings.rating(problem.contest_id, problem.index))
+            self.solved_count.append(0)
+            self.tags.append(tuple(problem.tags or ()))
+            self.by_contest[problem.contest_id].append(i)
+
+        for stat in statistics:
+            i = self.ids.get((stat.contest_id, stat.index))
+            if i is not None:
+                self.solved_count[i] = stat.solved_count
+
+        n = len(self.problems)
+        self.twin = self.link_twins({contest.id: contest.start_time for contest in contests or ()},
+                                    *(twins or ([], [])))
+        self.members = defaultdict(list)
+        for i in range(n):
+            self.members[self.twin[i]].append(i)
+
+        # Reports list problems in the order of their "1257C"-like names
+        self.name_rank = array('i', bytes(4 * n))
+        for rank, i in enumerate(sorted(range(n), key=lambda i: '{}{}'.format(*self.keys[i]))):
+            self.name_rank[i] = rank
+
+    def link_twins(self, starts, joined, separate):
+        parent = list(range(len(self.problems)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        def union(i, j):
+            i, j = find(i), find(j)
+            parent[max(i, j)] = min(i, j)
+
+        separate = set(self.ids[key] for key in separate if key in self.ids)
+        by_name = defaultdict(list)
+        for i, problem in enumerate(self.problems):
+            if problem.name and self.contest_id[i] and i not in separate:
+                by_name[problem.name].append(i)
+        for ids in by_name.values():
+            ids.sort(key=self.contest_id.__getitem__)
+            for i, j in zip(ids, ids[1:]):
+                a, b = self.contest_id[i], self.contest_id[j]
+                if b - a < TWIN_CONTEST_DISTANCE and \
+                        (a not in starts or b not in starts or abs(starts[b] - starts[a]) <= TWIN_START_DISTANCE_S):
+                    union(i, j)
+
+        for keys in joined:
+            ids = [self.ids[key] for key in keys if key in self.ids]
+            for i in ids[1:]:
+                union(ids[0], i)
+        return array('i', (find(i) for i in range(len(self.problems))))
+
+    def __len__(self):
+        return len(self.problems)
+
+    def twin_keys(self, i):
+        """Keys of the twin class of problem i, a run on any of them counts for i."""
+        return tuple(self.keys[j] for j in self.members[self.twin[i]])
+
+    def in_contests(self, contest_ids):
+        return sorted(i for contest_id in contest_ids for i in self.by_contest.get(contest_id, ()))
+
+
+def filter_week(catalogue, contests_ids):
+    return catalogue.in_contests(contests_ids)
+
+
+def filter_difficult(ids, catalogue, max_d):
+    rating = catalogue.rating
+    return filter(lambda i: rating[i] <= max_d, ids)
+
+
+def filter_easy(ids, catalogue, min_d):
+    rating = catalogue.rating
+    return filter(lambda i: rating[i] >= min_d, ids)
+
+
+def filter_easy_div1(ids, catalogue, min_d, id2contest):
+    rating = catalogue.rating
+    contest_id = catalogue.contest_id
+    return filter(lambda i: (('Div. 3' not in id2contest[contest_id[i]].name) and
+                             ('Div. 2' not in id2contest[contest_id[i]].name)) or
+                            (rating[i] >= min_d), ids)
+
+
+def rank_hardest(ids, catalogue):
+    # Stable, so ids of equal rating keep their order
+    return sorted(ids, key=lambda i: -catalogue.rating[i])
+
+
+def filter_unsolved(ids, catalogue, index):
+    # A solved twin from the other division counts
+    return filter(lambda i: not index.solved(i), ids)
+
+
+def sort_by_name(ids, catalogue):
+    return sorted(ids, key=catalogue.name_rank.__getitem__)
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+
+import json
+import os
+import sys
+import traceback
+
+from Batch import select_problems
+from Cassette import cached_transport
+from Catalogue import Catalogue
+from Catalogue import filter_week
+from Catalogue import load_twins
+from Dataset import Dataset
+from Instrument import call_profiled
+from Instrument import profile
+from Leaderboard import publish_leaderboards
+from Parallel import configure
+from Parallel import workers
+from Season import Season
+from Stream import streaming
+from SubmissionLog import SubmissionLog
+from Temp import print_list_of_problems_to_files
+from Users import get_users_by_handles
+from Users import merge_handles
+from Users import read_handles
+
+COHORTS = 'cohorts.json'
+
+
+class Cohort:
+    """One group of participants with its own season and coefficients.
+
+    c_easy and c_hard are a number or a list with one number per week. outputs
+    maps a file prefix to the number of problems its lists are capped at, -1
+    for uncapped; week w of prefix 'p' goes to p<w + 1>.html.
+    """
+
+    def __init__(self, name, start, weeks, handles='participants.txt', long_weeks=None, skipped=(),
+                 c_easy=0.8, c_hard=1.3, outputs=None):
+        self.name = name
+        self.handles = handles
+        # JSON object keys are strings
+        self.season = Season(start, weeks, {int(week): n for week, n in (long_weeks or {}).items()}, skipped)
+        self.c_easy = c_easy
+        self.c_hard = c_hard
+        self.outputs = outputs or {'tmp.': 5}
+
+    def coefficients(self, week):
+        c_easy = self.c_easy[week] if isinstance(self.c_easy, list) else self.c_easy
+        c_hard = self.c_hard[week] if isinstance(self.c_hard, list) else self.c_hard
+        return c_easy, c_hard
+
+
+def read_cohorts(file=COHORTS):
+    with open(file, 'r') as f:
+        return [Cohort(**config) for config in json.load(f)]
+
+
+def print_for_users(dataset, users, catalogue, cohort, week, id2contest, handle2rating):
+    c_easy, c_hard = cohort.coefficients(week)
+    problems = filter_week(catalogue, set(id2contest))
+    windows = select_problems(catalogue, problems, [handle2rating[user.handle] for user in users], c_easy, c_hard, -1)
+
+    # Every output of the week is cut from one evaluation of every user
+    candidates = {}
+    for prefix, cnt in cohort.outputs.items():
+        if os.path.dirname(prefix):
+            os.makedirs(os.path.dirname(prefix), exist_ok=True)
+        print_list_of_problems_to_files(dataset, users, catalogue, windows, candidates, prefix + str(week + 1) + '.html', cnt)
+
+
+def run(dataset, cohorts, users, catalogue):
+    """Reports of every cohort, users are the participants of all of them."""
+    dataset.warehouse.store_problems(catalogue)
+    by_handle = {user.handle.lower(): user for user in users}
+    contests = dataset.contests()
+
+    # Workers are forked once, with the submissions of every user read and indexed
+    with workers.sharing(dataset, catalogue,
+                         before_fork=lambda: dataset.prepare((user.handle for user in users), catalogue)):
+        for cohort in cohorts:
+            members = [by_handle[handle.lower()] for handle in read_handles(cohort.handles)
+                       if handle.lower() in by_handle]
+            weeks = cohort.season.split(contests)
+            for week in cohort.season.active_weeks():
+                with profile.stage(cohort.name, week):
+                    handle2rating = dataset.ratings_at(members, cohort.season.bounds(week)[0])
+                    print_for_users(dataset, members, catalogue, cohort, week, weeks[week], handle2rating)
+    publish_leaderboards(dataset.warehouse)
+
+
+def main():
+    # Cohorts.py [cohorts.json]: the reports of every cohort from one download
+    files = [arg for arg in sys.argv[1:] if arg.endswith('.json')]
+    cohorts = read_cohorts(files[0] if files else COHORTS)
+
+    configure(sys.argv[1:])
+    api = cached_transport(sys.argv[1:], offline='--offline' in sys.argv, resume='--resume' in sys.argv)
+    dataset = Dataset(api, log=SubmissionLog(api, stream=streaming(sys.argv[1:])))
+
+    users = get_users_by_handles(api, merge_handles(read_handles(cohort.handles) for cohort in cohorts))
+    with profile.stage('catalogue'):
+        catalogue = Catalogue(dataset.problems(), dataset.problem_statistics(), dataset.ratings(),
+                              dataset.contests(), load_twins())
+    call_profiled('--cprofile' in sys.argv, run, dataset, cohorts, users, catalogue)
+    print(dataset.report(), file=sys.stderr)
+    print(api.report(), file=sys.stderr)
+    profile.write()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except:
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+import argparse
+import importlib
+import os
+import signal
+import sys
+import threading
+import time
+import traceback
+
+from ApiCache import TTL
+from Cassette import add_transport_arguments
+from Cassette import open_cached_api
+from Catalogue import Catalogue
+from Catalogue import load_twins
+from Dataset import Dataset
+from Instrument import call_profiled
+from Instrument import profile
+from Parallel import add_worker_arguments
+from Parallel import workers
+from RatingStore import RatingStore
+from Report import FORMATS
+from Stream import streaming
+from SubmissionLog import SubmissionLog
+from Users import get_users
+from Warehouse import Warehouse
+
+INTERVAL_S = 60
+MAX_HANDLES = 1000
+
+
+def publish(season):
+    # Same as the del/rename pairs of run.bat
+    for week in season.active_weeks():
+        for extension in FORMATS:
+            tmp = 'tmp.{}.{}'.format(week + 1, extension)
+            if os.path.exists(tmp):
+                os.replace(tmp, 'codeforces-upsolving{}.{}'.format(week + 1, extension))
+
+
+class Daemon:
+    """Regenerates the reports of one script every interval seconds.
+
+    The client, the submission logs, the rating histories and the catalogue
+    live between cycles, a cycle only asks Codeforces for what has expired or
+    is new. The catalogue is rebuilt as often as the problemset expires in the
+    cache.
+    """
+
+    def __init__(self, script, api, interval=INTERVAL_S, max_handles=MAX_HANDLES, cprofile=False, stream=None):
+        self.script = script
+        self.api = api
+        self.interval = interval
+        self.cprofile = cprofile
+        self.log = SubmissionLog(api, max_handles=max_handles, stream=stream)
+        self.store = RatingStore(api)
+        self.warehouse = Warehouse()
+        self.catalogue = None
+        self.catalogue_time = 0
+        self.stopped = threading.Event()
+
+    def stop(self, *args):
+        self.stopped.set()
+
+    def cycle(self):
+        dataset = Dataset(self.api, log=self.log, store=self.store, warehouse=self.warehouse)
+        users = get_users(self.api)
+
+        if self.catalogue is None or time.time() - self.catalogue_time >= TTL['problemset_problems']:
+            with profile.stage('catalogue'):
+                self.catalogue = Catalogue(dataset.problems(), dataset.problem_statistics(), dataset.ratings(),
+                                           dataset.contests(), load_twins())
+            self.catalogue_time = time.time()
+
+        call_profiled(self.cprofile, self.script.run, dataset, users, self.catalogue)
+
+        publish(self.script.SEASON)
+        profile.write()
+        print(time.strftime('%Y-%m-%d %H:%M:%S'), dataset.report(), file=sys.stderr)
+
+    def serve(self):
+        while not self.stopped.is_set():
+            try:
+                self.cycle()
+            except Exception:
+                traceback.print_exc()
+            self.stopped.wait(self.interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Regenerate the upsolving reports in a loop.')
+    parser.add_argument('script', nargs='?', default='Second', help='script whose reports are generated')
+    parser.add_argument('--interval', type=float, default=INTERVAL_S, help='seconds between refreshes')
+    parser.add_argument('--max-handles', type=int, default=MAX_HANDLES, help='submission logs kept in memory')
+    parser.add_argument('--offline', action='store_true', help='serve Codeforces data only from the cache')
+    parser.add_argument('--stream', action='store_true', help='read user.status as it arrives, keeping accepted runs')
+    parser.add_argument('--cprofile', action='store_true', help='save cProfile stats of the last cycle')
+    add_transport_arguments(parser)
+    add_worker_arguments(parser)
+    args = parser.parse_args()
+
+    workers.processes = args.processes
+    api = open_cached_api(args, offline=args.offline)
+    daemon = Daemon(importlib.import_module(args.script), api, args.interval, args.max_handles, args.cprofile,
+                    streaming(sys.argv[1:]))
+    signal.signal(signal.SIGTERM, daemon.stop)
+    signal.signal(signal.SIGINT, daemon.stop)
+    daemon.serve()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except:
+        traceback.print_exc()
+        sys.exit(1)
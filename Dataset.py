@@ -0,0 +1,126 @@
+from Instrument import profile
+from RatingStore import RatingStore
+from Ratings import load_ratings
+from SubmissionLog import SubmissionLog
+from Upsolving import RunIndex
+from Upsolving import contest_ends
+from Warehouse import Warehouse
+
+
+class Dataset:
+    """Snapshot of everything one run reads from Codeforces.
+
+    The problemset, the contest list and the submissions of every handle are
+    downloaded at most once and then shared by all users, weeks and output files.
+    Submissions come from the local SubmissionLog, which only pulls new ones,
+    ratings from the RatingStore, which only asks for histories of handles
+    whose rating changed. Whatever is fetched is also copied into the
+    Warehouse.
+    """
+
+    def __init__(self, api, log=None, store=None, warehouse=None):
+        self.api = api
+        self.log = log or SubmissionLog(api)
+        self.store = store or RatingStore(api)
+        self.warehouse = warehouse or Warehouse()
+        self.requests = 0
+        self.fetches = 0
+        self._contests = None
+        self._problems = None
+        self._statistics = None
+        self._submissions = {}
+        self._indexes = {}
+        self._ends = None
+        self._rated = set()
+        self.failed = {}
+
+    def _fetch(self, stage, f, *args, user=None):
+        self.fetches += 1
+        with profile.stage(stage, user=user):
+            return f(*args)
+
+    def contests(self):
+        self.requests += 1
+        if self._contests is None:
+            self._contests = list(self._fetch('contest_list', self.api.contest_list))
+            self.warehouse.store_contests(self._contests)
+        return self._contests
+
+    def _load_problemset(self):
+        if self._problems is None:
+            data = self._fetch('problemset_problems', self.api.problemset_problems)
+            self._problems = list(data['problems'])
+            self._statistics = list(data['problemStatistics'])
+
+    def problems(self):
+        self.requests += 1
+        self._load_problemset()
+        return self._problems
+
+    def problem_statistics(self):
+        self.requests += 1
+        self._load_problemset()
+        return self._statistics
+
+    def ratings(self):
+        """Ratings of the problemset, the snapshot is rebuilt if it lacks some and Codeforces can be asked."""
+        return load_ratings(problems=self.problems(), rebuild=getattr(self.api, 'live', False))
+
+    def submissions(self, handle):
+        self.requests += 1
+        if handle in self.failed:
+            raise self.failed[handle]
+        if handle not in self._submissions:
+            try:
+                self._submissions[handle] = self._fetch('user_status', self.log.refresh, handle, user=handle)
+            except Exception as e:
+                # Every report of this run marks the handle failed without asking again
+                self.failed[handle] = e
+                raise
+            self.warehouse.store_submissions(handle, self._submissions[handle])
+        return self._submissions[handle]
+
+    def ratings_at(self, users, moment):
+        """Rating of every user at moment, the current one for users unrated by then."""
+        self.requests += 1
+        missing = [user for user in users if user.handle not in self._rated]
+        if missing:
+            self._fetch('user_rating', self.store.refresh, missing)
+            self._rated.update(user.handle for user in missing)
+        return {user.handle: self.store.rating_at(user.handle, moment, user.rating) for user in users}
+
+    def state(self, handle):
+        """Changes whenever the handle gets a new accepted run."""
+        runs = self.submissions(handle)
+        rows = runs.accepted()
+        return len(rows), max((runs.id[i] for i in rows), default=0)
+
+    def run_index(self, handle, catalogue):
+        if handle not in self._indexes:
+            self._indexes[handle] = RunIndex(self.submissions(handle), catalogue)
+        return self._indexes[handle]
+
+    def prepare(self, handles, catalogue):
+        """Reads everything evaluating handles needs, so forked workers neither fetch nor write."""
+        for handle in handles:
+            # A failed handle stays in failed and is reported by the scripts
+            if handle not in self.failed:
+                try:
+                    self.run_index(handle, catalogue)
+                except Exception:
+                    pass
+        self.contest_ends()
+
+    def contest_ends(self):
+        if self._ends is None:
+            self._ends = contest_ends(self.contests())
+        return self._ends
+
+    def saved(self):
+        return self.requests - self.fetches
+
+    def report(self):
+        res = 'Codeforces requests: {}, fetched: {}, saved: {}'.format(self.requests, self.fetches, self.saved())
+        if self.failed:
+            res += ', failed handles: ' + ' '.join(sorted(self.failed))
+        return res
@@ -0,0 +1,143 @@
+from collections import defaultdict
+from contextlib import contextmanager
+import cProfile
+import json
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows
+    resource = None
+
+from Report import write_file
+
+PROFILE = 'profile.json'
+METRICS = 'metrics.prom'
+CPROFILE = 'run.cprofile'
+
+# Upper bounds of the request latency histogram, in seconds
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def peak_rss_kb():
+    """Peak resident set size of the process, None where the platform does not tell it."""
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def new_method():
+    return {'calls': 0, 'errors': 0, 'retries': 0, 'cache_hits': 0, 'bytes': 0, 'latency_s': 0.0,
+            'histogram': [0] * (len(BUCKETS) + 1)}
+
+
+def new_timer():
+    return {'count': 0, 'total_s': 0.0, 'max_s': 0.0}
+
+
+def add_time(timer, elapsed):
+    timer['count'] += 1
+    timer['total_s'] += elapsed
+    timer['max_s'] = max(timer['max_s'], elapsed)
+
+
+class Profile:
+    """Counters and timers of one process.
+
+    Every CodeforcesAPI method gets its requests, errors, retries, cache hits,
+    response bytes and a latency histogram, every pipeline stage its time in
+    total, per week and per user. Everything accumulates over the life of the
+    process, so the daemon's metrics behave like Prometheus counters.
+    """
+
+    def __init__(self):
+        self.started = time.time()
+        self.methods = defaultdict(new_method)
+        self.stages = defaultdict(new_timer)
+        self.weeks = defaultdict(lambda: defaultdict(new_timer))
+        self.users = defaultdict(lambda: defaultdict(new_timer))
+
+    def request(self, name, elapsed, size=0, error=False):
+        method = self.methods[name]
+        method['calls'] += 1
+        method['errors'] += error
+        method['bytes'] += size
+        method['latency_s'] += elapsed
+        bucket = 0
+        while bucket < len(BUCKETS) and elapsed > BUCKETS[bucket]:
+            bucket += 1
+        method['histogram'][bucket] += 1
+
+    def hit(self, name):
+        self.methods[name]['cache_hits'] += 1
+
+    def retry(self, name):
+        self.methods[name]['retries'] += 1
+
+    def add(self, name, elapsed, week=None, user=None):
+        add_time(self.stages[name], elapsed)
+        if week is not None:
+            add_time(self.weeks[week + 1][name], elapsed)
+        if user is not None:
+            add_time(self.users[user][name], elapsed)
+
+    @contextmanager
+    def stage(self, name, week=None, user=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, week, user)
+
+    def to_json(self):
+        return json.dumps({
+            'started': self.started,
+            'wall_s': time.time() - self.started,
+            'peak_rss_kb': peak_rss_kb(),
+            'buckets': BUCKETS,
+            'methods': self.methods,
+            'stages': self.stages,
+            'weeks': self.weeks,
+            'users': self.users,
+        }, indent=1)
+
+    def to_prometheus(self):
+        lines = []
+        for name, method in sorted(self.methods.items()):
+            label = 'method="{}"'.format(name)
+            for counter in ('calls', 'errors', 'retries', 'cache_hits', 'bytes'):
+                lines.append('codeforces_{}_total{{{}}} {}'.format(counter, label, method[counter]))
+            total = 0
+            for bound, n in zip(BUCKETS + ('+Inf',), method['histogram']):
+                total += n
+                lines.append('codeforces_request_seconds_bucket{{{},le="{}"}} {}'.format(label, bound, total))
+            lines.append('codeforces_request_seconds_sum{{{}}} {}'.format(label, method['latency_s']))
+            lines.append('codeforces_request_seconds_count{{{}}} {}'.format(label, method['calls']))
+        for name, timer in sorted(self.stages.items()):
+            label = 'stage="{}"'.format(name)
+            lines.append('upsolving_stage_seconds_sum{{{}}} {}'.format(label, timer['total_s']))
+            lines.append('upsolving_stage_seconds_count{{{}}} {}'.format(label, timer['count']))
+            lines.append('upsolving_stage_seconds_max{{{}}} {}'.format(label, timer['max_s']))
+        if peak_rss_kb() is not None:
+            lines.append('upsolving_peak_rss_bytes {}'.format(peak_rss_kb() * 1024))
+        lines.append('upsolving_last_update_seconds {}'.format(time.time()))
+        return '\n'.join(lines) + '\n'
+
+    def write(self, file=PROFILE, metrics=METRICS):
+        write_file(file, self.to_json())
+        write_file(metrics, self.to_prometheus())
+
+
+def call_profiled(enabled, f, *args):
+    """f(*args), run under cProfile with the stats saved to CPROFILE when enabled."""
+    if not enabled:
+        return f(*args)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(f, *args)
+    finally:
+        profiler.dump_stats(CPROFILE)
+
+
+profile = Profile()
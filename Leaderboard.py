@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+
+import csv
+from datetime import datetime
+import html
+import io
+import json
+import os
+import sys
+import traceback
+
+from Report import ShardedReport
+from Report import board_week
+from Report import write_file
+from Warehouse import Warehouse
+
+SUFFIX = 'season'
+COLUMNS = ['rank', 'handle', 'upsolved', 'assigned', 'rate', 'weeks', 'completed', 'streak', 'best_streak']
+
+
+def rank(standings):
+    """Records of the standings rows, users with equal counts and rate share a rank."""
+    records = []
+    for i, (handle, upsolved, assigned, weeks, completed, streak, best_streak) in enumerate(standings):
+        rate = upsolved / assigned if assigned else 0.0
+        record = {'rank': i + 1, 'handle': handle, 'upsolved': upsolved, 'assigned': assigned, 'rate': round(rate, 3),
+                  'weeks': weeks, 'completed': completed, 'streak': streak, 'best_streak': best_streak}
+        if records and (records[-1]['upsolved'], records[-1]['rate']) == (upsolved, record['rate']):
+            record['rank'] = records[-1]['rank']
+        records.append(record)
+    return records
+
+
+def render_html(records):
+    lines = ['<table>\n<tr>' + ''.join('<th>{}</th>'.format(column) for column in COLUMNS) + '</tr>\n']
+    for record in records:
+        record = dict(record, rate='{:.0%}'.format(record['rate']))
+        lines.append('<tr>' + ''.join('<td>{}</td>'.format(html.escape(str(record[column]))) for column in COLUMNS)
+                     + '</tr>\n')
+    lines.append('</table>\n')
+    return ''.join(lines)
+
+
+def render_csv(records):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    for record in records:
+        writer.writerow([record[column] for column in COLUMNS])
+    return out.getvalue()
+
+
+def write_leaderboard(warehouse, board):
+    """Writes <board>season.html, .json and .csv, e.g. second/tmp.season.html."""
+    records = rank(warehouse.standings(board))
+    base = board + SUFFIX
+    write_file(base + '.html', render_html(records))
+    write_file(base + '.json', json.dumps({'generated': datetime.now().isoformat(), 'users': records}, indent=1))
+    write_file(base + '.csv', render_csv(records))
+
+
+def publish_leaderboards(warehouse, boards=None):
+    """Writes the leaderboards of boards, by default of the boards whose standings changed."""
+    for board in sorted(warehouse.changed if boards is None else boards):
+        write_leaderboard(warehouse, board)
+    warehouse.changed.clear()
+
+
+def rebuild(warehouse, files):
+    """Fills the cells from the shards of the weekly reports in files, for reports older than the standings."""
+    for file in files:
+        if board_week(file) is None:
+            raise Exception('{} is not the report of a week'.format(file))
+        board, week = board_week(file)
+        report = ShardedReport(file)
+        for handle in report.state['handles']:
+            if not os.path.exists(report.shard(handle)):
+                continue
+            record = report.record(handle)
+            if record.get('error') is None:
+                warehouse.store_cell(board, week, handle, record['upsolved'], record['assigned'])
+
+
+def main():
+    # Leaderboard.py [tmp.1.html ...]: the season tables of every board, filled from the given reports first
+    warehouse = Warehouse()
+    rebuild(warehouse, sys.argv[1:])
+    publish_leaderboards(warehouse, warehouse.boards())
+    warehouse.close()
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except:
+        traceback.print_exc()
+        sys.exit(1)
@@ -0,0 +1,111 @@
+import argparse
+from contextlib import contextmanager
+import io
+import multiprocessing
+import pickle
+import time
+
+# Chunks every process gets, more of them even out users of different cost
+CHUNKS_PER_PROCESS = 4
+
+# Objects the workers were forked with, tasks refer to them by position
+_shared = ()
+
+
+class _SharedPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        for i, shared in enumerate(_shared):
+            if obj is shared:
+                return i
+        return None
+
+
+class _SharedUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        return _shared[pid]
+
+
+def _run_chunk(f, items):
+    res = []
+    for item in items:
+        start = time.perf_counter()
+        value = f(*item)
+        res.append((value, time.perf_counter() - start))
+    return res
+
+
+def _run_task(task):
+    return _run_chunk(*_SharedUnpickler(io.BytesIO(task)).load())
+
+
+def _task(f, items):
+    out = io.BytesIO()
+    _SharedPickler(out, pickle.HIGHEST_PROTOCOL).dump((f, items))
+    return out.getvalue()
+
+
+class Workers:
+    """Pool of processes forked from the current one.
+
+    The pool is forked once per sharing block, when the first task needs it,
+    and serves every map of the block. Workers inherit the shared objects,
+    catalogue and dataset, through fork, a task refers to them by position and
+    pickles only the rest of its arguments, the results are pickled back.
+    Results come back in the order of the items, chunk by chunk as they are
+    done, so the reports do not depend on the number of processes. Outside a
+    sharing block, without fork (Windows) or with a single process everything
+    runs here.
+    """
+
+    def __init__(self, processes=1):
+        self.processes = processes
+        self.pool = None
+        self.before_fork = None
+
+    def parallel(self, n):
+        return self.processes > 1 and n > 1 and 'fork' in multiprocessing.get_all_start_methods()
+
+    @contextmanager
+    def sharing(self, *shared, before_fork=None):
+        """Maps of the block share a pool forked with shared, before_fork reads what the workers will need."""
+        global _shared
+        _shared = shared
+        self.before_fork = before_fork
+        try:
+            yield self
+        finally:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool.join()
+            self.pool = None
+            self.before_fork = None
+            _shared = ()
+
+    def timed_map(self, f, items):
+        """(f(*item), seconds it took) for item in items, each as soon as it and the ones before it are done."""
+        items = list(items)
+        if not _shared or not self.parallel(len(items)):
+            for item in items:
+                yield from _run_chunk(f, [item])
+            return
+        if self.pool is None:
+            if self.before_fork is not None:
+                self.before_fork()
+            self.pool = multiprocessing.get_context('fork').Pool(self.processes)
+        chunk = -(-len(items) // (self.processes * CHUNKS_PER_PROCESS))
+        tasks = [_task(f, items[lo:lo + chunk]) for lo in range(0, len(items), chunk)]
+        for part in self.pool.imap(_run_task, tasks):
+            yield from part
+
+
+def add_worker_arguments(parser):
+    parser.add_argument('--processes', type=int, default=1, help='processes evaluating users in parallel')
+
+
+def configure(argv):
+    parser = argparse.ArgumentParser(add_help=False)
+    add_worker_arguments(parser)
+    workers.processes = parser.parse_known_args(argv)[0].processes
+
+
+workers = Workers()
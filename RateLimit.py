@@ -0,0 +1,33 @@
+import time
+import urllib.error
+
+# Codeforces answers "Call limit exceeded" to more than 5 requests per second
+API_INTERVAL = 0.2
+CALL_LIMIT_EXCEEDED = 'Call limit exceeded'
+
+# A failed request is repeated RETRIES times, waiting BACKOFF_S, 2 * BACKOFF_S, ... before each
+RETRIES = 4
+BACKOFF_S = 1.0
+
+
+class RateLimiter:
+    def __init__(self, interval=API_INTERVAL):
+        self.interval = interval
+        self.last = 0
+
+    def wait(self):
+        delay = self.last + self.interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.last = time.monotonic()
+
+
+def is_transient(error):
+    """Whether the same request can succeed later, unlike e.g. an unknown handle."""
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code >= 500 or error.code == 429
+    # Connection failures and timeouts are OSErrors, a rejection by the rate limit is a comment of the API
+    return isinstance(error, OSError) or CALL_LIMIT_EXCEEDED in str(error)
+
+
+limiter = RateLimiter()
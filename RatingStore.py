@@ -0,0 +1,58 @@
+from array import array
+from bisect import bisect_right
+import os
+import pickle
+import sys
+
+STORE = 'rating_history.pickle'
+
+
+class RatingStore:
+    """Rating history of every handle, kept on disk.
+
+    Filled from user.rating, answers what the rating of a handle was at any
+    moment, so the ratings of past weeks can be recomputed exactly. A stored
+    history is asked for again only when the current rating from user.info
+    is not the last one in it, that is after a new rated contest.
+    """
+
+    def __init__(self, api, file=STORE):
+        self.api = api
+        self.file = file
+        self.history = {}
+        if os.path.exists(file):
+            with open(file, 'rb') as f:
+                self.history = pickle.load(f)
+
+    def save(self):
+        tmp = self.file + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(self.history, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.file)
+
+    def current(self, user):
+        if user.handle not in self.history:
+            return False
+        ratings = self.history[user.handle][1]
+        return ratings[-1] == user.rating if ratings else not user.rating
+
+    def refresh(self, users):
+        stale = [user.handle for user in users if not self.current(user)]
+        for handle in stale:
+            try:
+                changes = sorted(self.api.user_rating(handle), key=lambda change: change.rating_update_time)
+            except Exception as e:
+                print('Keeping stored rating history of', handle + ':', e, file=sys.stderr)
+                continue
+            self.history[handle] = (array('q', (change.rating_update_time for change in changes)),
+                                    array('i', (change.new_rating for change in changes)))
+        if stale:
+            self.save()
+
+    def rating_at(self, handle, moment, default=None):
+        """Rating right before moment, default if the handle had no rated contest by then."""
+        if handle not in self.history:
+            return default
+        times, ratings = self.history[handle]
+        i = bisect_right(times, moment)
+        return ratings[i - 1] if i else default
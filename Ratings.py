@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+import time
+import traceback
+
+from ApiCache import TTL
+from Catalogue import NO_RATING
+from Stream import StreamingCodeforces
+
+SNAPSHOT = 'catalogue.bin'
+OVERRIDES = 'problems.txt'
+
+MAGIC = b'CFPR'
+VERSION = 1
+# magic, version, number of problems, build time
+HEADER = struct.Struct('<4sIId')
+INDEX_LEN = 4
+
+
+def fetch_problemset():
+    # The JSON is read directly because CodeforcesAPI drops the rating of a problem
+    return StreamingCodeforces().problemset_problems()
+
+
+def write_snapshot(problems, statistics, file=SNAPSHOT):
+    solved = {(s['contestId'], s['index']): s['solvedCount'] for s in statistics if 'contestId' in s}
+    rows = sorted((p['contestId'], p['index'], p.get('rating', NO_RATING), solved.get((p['contestId'], p['index']), 0))
+                  for p in problems if 'contestId' in p)
+    n = len(rows)
+
+    tmp = file + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, n, time.time()))
+        f.write(struct.pack('<{}i'.format(n), *(row[0] for row in rows)))
+        f.write(b''.join(row[1].encode().ljust(INDEX_LEN, b'\0') for row in rows))
+        f.write(struct.pack('<{}i'.format(n), *(row[2] for row in rows)))
+        f.write(struct.pack('<{}i'.format(n), *(row[3] for row in rows)))
+    os.replace(tmp, file)
+    return n
+
+
+class RatingSnapshot:
+    """Problem ratings memory-mapped from a snapshot written by write_snapshot.
+
+    Columns are read in place, opening the snapshot costs the same for the
+    whole archive as for a single week.
+    """
+
+    def __init__(self, file=SNAPSHOT):
+        with open(file, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, n, self.built = HEADER.unpack_from(self.map)
+        if magic != MAGIC or version != VERSION:
+            raise Exception('{} is not a version {} problem snapshot'.format(file, VERSION))
+
+        self.view = memoryview(self.map)[HEADER.size:]
+        self.n = n
+        self.contest_id = self.view[:4 * n].cast('i')
+        self.index = self.view[4 * n:(4 + INDEX_LEN) * n]
+        self.rating = self.view[(4 + INDEX_LEN) * n:(8 + INDEX_LEN) * n].cast('i')
+        self.solved_count = self.view[(8 + INDEX_LEN) * n:(12 + INDEX_LEN) * n].cast('i')
+
+    def __len__(self):
+        return self.n
+
+    def close(self):
+        # The map cannot be closed while a view of it is alive
+        for column in (self.contest_id, self.index, self.rating, self.solved_count, self.view):
+            column.release()
+        self.map.close()
+
+    def find(self, contest_id, index):
+        index = index.encode().ljust(INDEX_LEN, b'\0')
+        i = bisect_left(self.contest_id, contest_id)
+        while i < self.n and self.contest_id[i] == contest_id:
+            if self.index[INDEX_LEN * i:INDEX_LEN * (i + 1)] == index:
+                return i
+            i += 1
+        return None
+
+    def get(self, contest_id, index):
+        i = self.find(contest_id, index)
+        return NO_RATING if i is None else self.rating[i]
+
+
+def read_overrides(file=OVERRIDES):
+    """Ratings copied from the problemset page, "1257C <name> ... 1200 x6713" per line."""
+    res = {}
+    with open(file, 'r') as f:
+        for line in f:
+            s = line.split()
+            tail = s[s.index('favourites') + 1:] if 'favourites' in s else s[1:]
+            numbers = [x for x in tail if x.isdigit()]
+            if numbers:
+                res[s[0]] = int(numbers[-1])
+    return res
+
+
+class Ratings:
+    def __init__(self, snapshot=None, overrides=None):
+        self.snapshot = snapshot
+        self.overrides = overrides or {}
+
+    def rating(self, contest_id, index):
+        key = '{}{}'.format(contest_id, index)
+        if key in self.overrides:
+            return self.overrides[key]
+        if self.snapshot is None or contest_id is None:
+            return NO_RATING
+        return self.snapshot.get(contest_id, index)
+
+    def known(self, contest_id, index):
+        return '{}{}'.format(contest_id, index) in self.overrides or \
+            (self.snapshot is not None and contest_id is not None and self.snapshot.find(contest_id, index) is not None)
+
+    def unknown(self, problems):
+        return [problem for problem in problems if not self.known(problem.contest_id, problem.index)]
+
+
+def load_ratings(snapshot=SNAPSHOT, overrides=OVERRIDES, problems=(), rebuild=False):
+    """Ratings of the problems, from the overrides first and the snapshot second.
+
+    With rebuild the snapshot is fetched again when it is older than the
+    problemset in the cache may be, or when some of problems are in neither,
+    e.g. the problems of a week held after it was built. Problems that stay
+    unknown get NO_RATING, which keeps them out of every window, and are
+    reported.
+    """
+    ratings = Ratings(RatingSnapshot(snapshot) if os.path.exists(snapshot) else None,
+                      read_overrides(overrides) if os.path.exists(overrides) else None)
+    expired = ratings.snapshot is not None and time.time() - ratings.snapshot.built > TTL['problemset_problems']
+    if rebuild and (expired or ratings.unknown(problems)):
+        try:
+            print('Rebuilding', snapshot, file=sys.stderr)
+            problemset = fetch_problemset()
+            if ratings.snapshot is not None:
+                ratings.snapshot.close()
+                ratings.snapshot = None
+            write_snapshot(*problemset, file=snapshot)
+        except Exception as e:
+            print('Could not rebuild', snapshot + ':', e, file=sys.stderr)
+        if ratings.snapshot is None and os.path.exists(snapshot):
+            ratings.snapshot = RatingSnapshot(snapshot)
+
+    unknown = ratings.unknown(problems)
+    if unknown:
+        print('Warning: {} problems have no rating, e.g. {}'.format(
+            len(unknown), ' '.join('{}{}'.format(p.contest_id, p.index) for p in unknown[:10])), file=sys.stderr)
+    return ratings
+
+
+def main():
+    problems, statistics = fetch_problemset()
+    n = write_snapshot(problems, statistics)
+    print('Saved', n, 'problems to', SNAPSHOT, file=sys.stderr)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except:
+        traceback.print_exc()
+        sys.exit(1)
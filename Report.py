@@ -0,0 +1,203 @@
+import csv
+from datetime import datetime
+import hashlib
+import html
+import io
+import json
+import os
+import sys
+
+FORMATS = ('html', 'json', 'csv')
+
+
+def write_file(path, text):
+    """Publish text under path at once, readers see either the old or the new file."""
+    tmp = path + '.tmp'
+    with open(tmp, 'wt', newline='') as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def digest(value):
+    return hashlib.sha1(repr(value).encode()).hexdigest()
+
+
+def problem_url(contest_id, index):
+    return 'http://codeforces.com/contest/{}/problem/{}'.format(contest_id, index)
+
+
+def make_url(problem):
+    s = problem_url(problem['contest_id'], problem['index'])
+    return '<a href =\"'+s+'\">'+s+'</a><br>'
+
+
+def make_record(handle, ok_ups, problems):
+    """What a report says about one user, every format is rendered from it."""
+    return {
+        'handle': handle,
+        'upsolved': ok_ups,
+        'assigned': ok_ups + len(problems),
+        'problems': [{'contest_id': p.contest_id, 'index': p.index, 'name': p.name,
+                      'url': problem_url(p.contest_id, p.index)} for p in problems],
+    }
+
+
+def make_failed_record(handle, error):
+    """Section of a user whose data could not be fetched."""
+    return {'handle': handle, 'upsolved': 0, 'assigned': 0, 'problems': [], 'error': str(error)}
+
+
+def render_section(record):
+    if record.get('error') is not None:
+        return "----- {} FAILED: {}-----<br>\n".format(record['handle'], html.escape(record['error']))
+    lines = ["----- {} {}/{}-----<br>\n".format(record['handle'], record['upsolved'], record['assigned'])]
+    lines.extend(make_url(problem) + "\n" for problem in record['problems'])
+    return ''.join(lines)
+
+
+def render_html(records, stamp=None):
+    page = []
+    if stamp is not None:
+        page.append('<object data="{}" type="text/plain" height="24"></object><br>\n'.format(stamp))
+    page.extend(render_section(record) for record in records)
+    return ''.join(page)
+
+
+def render_json(records):
+    return json.dumps({'generated': datetime.now().isoformat(), 'users': records}, indent=1)
+
+
+def render_csv(records):
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(['handle', 'upsolved', 'assigned', 'contest_id', 'index', 'name', 'url', 'error'])
+    for record in records:
+        head = [record['handle'], record['upsolved'], record['assigned']]
+        error = record.get('error') or ''
+        if not record['problems']:
+            writer.writerow(head + ['', '', '', '', error])
+        for problem in record['problems']:
+            writer.writerow(head + [problem['contest_id'], problem['index'], problem['name'], problem['url'], error])
+    return out.getvalue()
+
+
+def base_name(file):
+    return file[:-len('.html')] if file.endswith('.html') else file
+
+
+def board_week(file):
+    """('second/tmp.', 3) for the report of week 3 'second/tmp.3.html', None for other files."""
+    base = base_name(file)
+    digits = len(base) - len(base.rstrip('0123456789'))
+    if not digits:
+        return None
+    return base[:-digits], int(base[-digits:])
+
+
+def write_report(file, records, stamp=None):
+    """Writes file (html) plus .json and .csv siblings from the same records."""
+    base = base_name(file)
+    write_file(base + '.html', render_html(records, stamp))
+    write_file(base + '.json', render_json(records))
+    write_file(base + '.csv', render_csv(records))
+
+
+class ShardedReport:
+    """Report kept as one shard per user.
+
+    A user whose section key (assigned problems and accepted runs) did not change
+    since the previous refresh is not evaluated again, a shard is rewritten
+    only when its record or key changed, and the pages stitching the shards
+    together only when some record did. The update time lives in a file of its
+    own, so a refresh where nothing happened writes just that file. Changed
+    records are also stored as assignments in the warehouse, if one is given.
+
+    Every shard carries its key and is written as soon as the user is done, so
+    a run that dies halfway is resumed from the shards it left. A user whose
+    data could not be fetched gets a failed section, which is never fresh.
+    """
+
+    def __init__(self, file, warehouse=None):
+        self.file = file
+        self.warehouse = warehouse
+        self.directory = base_name(file) + '.shards'
+        self.state_file = os.path.join(self.directory, 'state.json')
+        self.stamp_file = os.path.join(self.directory, 'updated.txt')
+        os.makedirs(self.directory, exist_ok=True)
+
+        self.state = {'handles': [], 'shards': {}}
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as f:
+                self.state = json.load(f)
+        self.records = {}
+        self.written = 0
+        self.skipped = 0
+        self.failed = []
+        self.dirty = False
+
+    def shard(self, handle):
+        return os.path.join(self.directory, handle + '.json')
+
+    def read_shard(self, handle):
+        with open(self.shard(handle), 'r') as f:
+            data = json.load(f)
+        # Shards written before they carried their key hold just the record
+        return (data['key'], data['record']) if 'record' in data else (None, data)
+
+    def fresh(self, handle, key):
+        shard = self.state['shards'].get(handle)
+        if not os.path.exists(self.shard(handle)):
+            return False
+        if shard is None or shard[0] != key:
+            # A checkpoint of an interrupted run, the state was not saved after it
+            shard_key, record = self.read_shard(handle)
+            if shard_key != key:
+                return False
+            self.state['shards'][handle] = [key, digest(json.dumps(record))]
+            self.records[handle] = record
+            self.written += 1
+            self.dirty = True
+        self.skipped += 1
+        return True
+
+    def update(self, handle, key, record):
+        text_hash = digest(json.dumps(record))
+        shard = self.state['shards'].get(handle)
+        exists = os.path.exists(self.shard(handle))
+        if shard != [key, text_hash] or not exists:
+            write_file(self.shard(handle), json.dumps({'key': key, 'record': record}))
+            if shard is None or shard[1] != text_hash or not exists:
+                self.written += 1
+            self.state['shards'][handle] = [key, text_hash]
+            self.dirty = True
+            if self.warehouse is not None:
+                self.warehouse.store_assignment(self.file, record)
+        self.records[handle] = record
+
+    def fail(self, handle, error):
+        print('Failed handle', handle + ':', error, file=sys.stderr)
+        self.failed.append(handle)
+        self.update(handle, None, make_failed_record(handle, error))
+
+    def record(self, handle):
+        if handle not in self.records:
+            self.records[handle] = self.read_shard(handle)[1]
+        return self.records[handle]
+
+    def publish(self, handles):
+        write_file(self.stamp_file, "Last time updated: {}\n".format(datetime.now()))
+
+        if handles != self.state['handles']:
+            for handle in set(self.state['shards']) - set(handles):
+                del self.state['shards'][handle]
+                if os.path.exists(self.shard(handle)):
+                    os.remove(self.shard(handle))
+            self.state['handles'] = handles
+            self.written += 1
+            self.dirty = True
+
+        if self.written:
+            stamp = os.path.relpath(self.stamp_file, os.path.dirname(self.file) or '.')
+            write_report(self.file, [self.record(handle) for handle in handles], stamp)
+        if self.dirty:
+            write_file(self.state_file, json.dumps(self.state))
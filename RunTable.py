@@ -0,0 +1,115 @@
+from array import array
+
+from codeforces import VerdictType
+
+# Verdict codes, 0 is a run without a verdict yet
+VERDICTS = [None] + list(VerdictType)
+VERDICT_CODE = {verdict: code for code, verdict in enumerate(VERDICTS)}
+OK = VERDICT_CODE[VerdictType.ok]
+TESTING = VERDICT_CODE[VerdictType.testing]
+
+# (contest id, index, name) of every problem seen, tables of all handles refer to them by position
+PROBLEMS = []
+_problem_ids = {}
+
+
+def problem_id(key):
+    if key not in _problem_ids:
+        _problem_ids[key] = len(PROBLEMS)
+        PROBLEMS.append(key)
+    return _problem_ids[key]
+
+
+class RunTable:
+    """Submissions of one handle, newest first, packed into typed arrays.
+
+    Only what the pipeline reads is kept: id, creation time, verdict code and
+    the problem, a position in PROBLEMS, which the tables of all handles share.
+    Row i of every array is the i-th run. The accepted runs are a view holding
+    row numbers, computed once.
+    """
+
+    def __init__(self):
+        self.id = array('q')
+        self.time = array('q')
+        self.verdict = array('b')
+        self.problem = array('i')
+        self._accepted = None
+
+    @classmethod
+    def from_runs(cls, runs):
+        table = cls()
+        for run in runs:
+            table.append(run)
+        return table
+
+    @classmethod
+    def from_json(cls, runs):
+        """Table of runs as user.status sends them, without building Submission objects."""
+        table = cls()
+        for run in runs:
+            problem = run['problem']
+            table.append_row(run['id'], run['creationTimeSeconds'],
+                             VERDICT_CODE[VerdictType(run['verdict'])] if 'verdict' in run else 0,
+                             (problem.get('contestId'), problem['index'], problem['name']))
+        return table
+
+    def __len__(self):
+        return len(self.id)
+
+    def append(self, run):
+        self.append_row(run.id, run.creation_time, VERDICT_CODE[run.verdict],
+                        (run.problem.contest_id, run.problem.index, run.problem.name))
+
+    def append_row(self, id, time, verdict, key):
+        self.id.append(id)
+        self.time.append(time)
+        self.verdict.append(verdict)
+        self.problem.append(problem_id(key))
+        self._accepted = None
+
+    def extend(self, table, rows):
+        for i in rows:
+            self.id.append(table.id[i])
+            self.time.append(table.time[i])
+            self.verdict.append(table.verdict[i])
+            self.problem.append(table.problem[i])
+        self._accepted = None
+
+    def is_final(self, i):
+        return self.verdict[i] not in (0, TESTING)
+
+    def verdict_name(self, i):
+        verdict = VERDICTS[self.verdict[i]]
+        return verdict.name if verdict is not None else None
+
+    def key(self, i):
+        """(contest id, index, name) of the problem of run i."""
+        return PROBLEMS[self.problem[i]]
+
+    def accepted(self):
+        if self._accepted is None:
+            self._accepted = array('i', (i for i, verdict in enumerate(self.verdict) if verdict == OK))
+        return self._accepted
+
+    def __getstate__(self):
+        # Positions in PROBLEMS and verdict codes mean nothing to another process, they are
+        # stored with the keys and names they stand for
+        used = sorted(set(self.problem))
+        local = {problem: i for i, problem in enumerate(used)}
+        return {'id': self.id, 'time': self.time, 'verdict': self.verdict,
+                'problem': array('i', (local[problem] for problem in self.problem)),
+                'problems': [PROBLEMS[problem] for problem in used],
+                'verdicts': [verdict and verdict.name for verdict in VERDICTS]}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.id, self.time = state['id'], state['time']
+        ids = [problem_id(key) for key in state['problems']]
+        self.problem = array('i', (ids[problem] for problem in state['problem']))
+        names = state['verdicts']
+        if names == [verdict and verdict.name for verdict in VERDICTS]:
+            self.verdict = state['verdict']
+        else:
+            codes = [VERDICT_CODE[VerdictType[name]] if name else 0 for name in names]
+            self.verdict = array('b', (codes[code] for code in state['verdict']))
@@ -1,17 +1,16 @@
 import sys
 import traceback
-from codeforces import CodeforcesAPI
-from First import get_users
+from Cassette import cached_transport
+from Report import write_file
+from Users import get_users
 
 
 def save_ratings_to_file(users, file):
-    sys.stdout = open(file, 'wt')
-    for user in users:
-        print(user.handle, user.rating)
+    write_file(file, ''.join('{} {}\n'.format(user.handle, user.rating) for user in users))
 
 
 def main():
-    api = CodeforcesAPI()
+    api = cached_transport(sys.argv[1:], offline='--offline' in sys.argv)
 
     users = get_users(api)
     save_ratings_to_file(users, 'rating1.txt')
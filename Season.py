@@ -0,0 +1,38 @@
+from bisect import bisect_left
+from bisect import bisect_right
+from datetime import datetime
+
+WEEK_S = 7 * 24 * 60 * 60
+
+
+class Season:
+    """Weeks of one training season and the contests held in each of them.
+
+    long_weeks maps a week to its length in weeks, skipped weeks get no report.
+    """
+
+    def __init__(self, start, weeks, long_weeks=None, skipped=()):
+        self.start = datetime.timestamp(datetime.fromisoformat(start))
+        self.weeks = weeks
+        self.long_weeks = long_weeks or {}
+        self.skipped = set(skipped)
+
+    def active_weeks(self):
+        return [week for week in range(self.weeks) if week not in self.skipped]
+
+    def bounds(self, week):
+        week_start = self.start + WEEK_S * week
+        return week_start, week_start + WEEK_S * self.long_weeks.get(week, 1)
+
+    def split(self, contests):
+        """Contests of every active week as {week: {contest id: contest}}, sorting the list only once."""
+        contests = sorted(contests, key=lambda contest: contest.start_time)
+        starts = [contest.start_time for contest in contests]
+
+        res = {}
+        for week in self.active_weeks():
+            week_start, week_end = self.bounds(week)
+            lo = bisect_right(starts, week_start)
+            hi = bisect_left(starts, week_end)
+            res[week] = {contest.id: contest for contest in contests[lo:hi]}
+        return res
@@ -0,0 +1,178 @@
+import codecs
+import json
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from ApiCache import request_with_retries
+from Instrument import profile
+
+API_URL = 'https://codeforces.com/api/'
+CHUNK = 64 * 1024
+TIMEOUT_S = 60
+
+_decoder = json.JSONDecoder()
+# Between the elements of an array
+_separator = re.compile(r'[\s,]*')
+
+
+class JsonStream:
+    """A JSON document read from a file chunk by chunk.
+
+    Only the text from the current position on is held. The elements of an
+    array are decoded one at a time, as soon as each is complete, so the
+    document as a whole is never decoded.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.utf8 = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+        self.bytes = 0
+
+    def more(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK)
+        self.bytes += len(chunk)
+        self.eof = not chunk
+        self.buf = self.buf[self.pos:] + self.utf8.decode(chunk, final=self.eof)
+        self.pos = 0
+        return True
+
+    def skip(self):
+        while True:
+            self.pos = _separator.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf) or not self.more():
+                return
+
+    def seek(self, key):
+        """Moves past the next "key":, False when the document ends first."""
+        token = '"{}":'.format(key)
+        while True:
+            i = self.buf.find(token, self.pos)
+            if i >= 0:
+                self.pos = i + len(token)
+                return True
+            # The token may be cut by the end of the chunk
+            self.pos = max(self.pos, len(self.buf) - len(token))
+            if not self.more():
+                return False
+
+    def value(self):
+        self.skip()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # A number at the end of the text may go on in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except ValueError:
+                if self.eof:
+                    raise
+            self.more()
+
+    def items(self, key):
+        """Elements of the array under the next "key":, one by one."""
+        if not self.seek(key):
+            raise ValueError('No {} in the response'.format(key))
+        self.skip()
+        if self.buf[self.pos:self.pos + 1] != '[':
+            raise ValueError('{} is not an array'.format(key))
+        self.pos += 1
+        while True:
+            self.skip()
+            if self.pos == len(self.buf):
+                raise ValueError('{} is cut short'.format(key))
+            if self.buf[self.pos] == ']':
+                self.pos += 1
+                return
+            yield self.value()
+
+    def check(self, method):
+        # Codeforces puts the status first, a failed request has a comment instead of a result
+        if not self.seek('status'):
+            raise ValueError('{}: no status in the response'.format(method))
+        status = self.value()
+        if status != 'OK':
+            raise Exception('{}: {}'.format(method, self.value() if self.seek('comment') else status))
+
+
+class StreamingCodeforces:
+    """Reads user.status and problemset.problems as they arrive.
+
+    A request takes the predicates of the caller: what does not pass them is
+    dropped while the response is parsed, as plain JSON objects, and neither
+    Submission nor Problem objects are ever built. user.status lists the newest
+    runs first, so the bound on the id ends the read early. The catalogue is
+    not read here: it indexes the whole problemset for every week, cohort and
+    twin class, and is decoded once per cached problemset.
+    Requests share the rate limiter and the retries of CachedCodeforcesAPI but
+    are neither cached nor recorded.
+    """
+
+    def __init__(self, url=API_URL, timeout=TIMEOUT_S):
+        self.url = url
+        self.timeout = timeout
+
+    def read(self, method, params, parse):
+        def attempt():
+            query = '?' + urllib.parse.urlencode(params) if params else ''
+            try:
+                response = urllib.request.urlopen(self.url + method + query, timeout=self.timeout)
+            except urllib.error.HTTPError as e:
+                # A failed request comes with an error status, the reason is the comment of its body
+                if e.code < 500:
+                    try:
+                        JsonStream(e).check(method)
+                    except ValueError:
+                        pass
+                raise
+            with response:
+                stream = JsonStream(response)
+                stream.check(method)
+                return parse(stream), stream.bytes
+
+        (res, size), elapsed = request_with_retries(method, attempt, tuple(params.values()))
+        profile.request(method, elapsed, size)
+        return res
+
+    def user_status(self, handle, verdicts=None, after_id=None):
+        """Runs of handle, newest first, as JSON objects.
+
+        verdicts is a set of verdict names, None standing for a run not judged
+        yet. Reading stops at the first run with an id of at most after_id.
+        """
+        def parse(stream):
+            res = []
+            for run in stream.items('result'):
+                if after_id is not None and run['id'] <= after_id:
+                    break
+                if verdicts is None or run.get('verdict') in verdicts:
+                    res.append(run)
+            return res
+
+        return self.read('user.status', {'handle': handle}, parse)
+
+    def problemset_problems(self):
+        """(problems, problem statistics) of contests as JSON objects, the ones outside contests are dropped."""
+        def parse(stream):
+            problems = [problem for problem in stream.items('problems') if 'contestId' in problem]
+            statistics = [s for s in stream.items('problemStatistics') if 'contestId' in s]
+            return problems, statistics
+
+        return self.read('problemset.problems', {}, parse)
+
+
+def streaming(argv):
+    """StreamingCodeforces if the command line asks for --stream and allows requests."""
+    if '--stream' not in argv or '--offline' in argv or any(arg.startswith('--replay') for arg in argv):
+        return None
+    if any(arg.startswith('--record') for arg in argv):
+        # Streamed requests go past the cassette, its replay would miss all of them
+        raise Exception('--stream cannot be recorded, record without it')
+    return StreamingCodeforces()
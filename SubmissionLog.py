@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import os
+import pickle
+
+from ApiCache import OfflineCacheMiss
+from RunTable import RunTable
+
+LOG_DIR = 'submissions'
+PAGE = 100
+# What a streamed refresh keeps: the pipeline reads accepted runs, the ones being judged are asked for again
+STREAMED_VERDICTS = {'OK', 'TESTING', None}
+
+
+class SubmissionLog:
+    """Local copy of the submissions of every handle.
+
+    A refresh asks user.status only for the newest pages and stops at the first
+    submission that is already known, so its cost depends on the new activity
+    rather than on the age of the account. A handle without a log gets its
+    whole history in one request. The log is the cache of user.status, its
+    answers are not put in the response cache, and offline the log is served
+    as it is. Submissions still being judged are
+    never treated as known and are requested again on the next refresh.
+    With a StreamingCodeforces in stream the new runs come in a single request
+    that is read only up to the known ones, and runs rejected by the judge are
+    not kept. Submissions are kept as RunTables. Up to max_handles logs stay in memory,
+    the least recently used ones are dropped and read from disk again when needed.
+    """
+
+    def __init__(self, api, directory=LOG_DIR, page=PAGE, max_handles=None, stream=None):
+        self.api = api
+        self.stream = stream
+        self.directory = directory
+        self.page = page
+        self.max_handles = max_handles
+        self.memory = OrderedDict()
+        self.requests = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, handle):
+        return os.path.join(self.directory, handle + '.pickle')
+
+    def remember(self, handle, runs):
+        self.memory[handle] = runs
+        self.memory.move_to_end(handle)
+        while self.max_handles is not None and len(self.memory) > self.max_handles:
+            self.memory.popitem(last=False)
+
+    def load(self, handle):
+        if handle in self.memory:
+            runs = self.memory[handle]
+        elif os.path.exists(self.path(handle)):
+            with open(self.path(handle), 'rb') as f:
+                runs = pickle.load(f)
+            # Logs saved before RunTable are lists of Submission objects
+            if isinstance(runs, list):
+                runs = RunTable.from_runs(runs)
+        else:
+            runs = RunTable()
+        self.remember(handle, runs)
+        return runs
+
+    def save(self, handle, runs):
+        tmp = self.path(handle) + '.tmp'
+        with open(tmp, 'wb') as f:
+            pickle.dump(runs, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path(handle))
+        self.remember(handle, runs)
+
+    @staticmethod
+    def last_known_id(runs):
+        pending = [runs.id[i] for i in range(len(runs)) if not runs.is_final(i)]
+        if pending:
+            return min(pending) - 1
+        return runs.id[0] if len(runs) else -1
+
+    def user_status(self, handle, **kwargs):
+        self.requests += 1
+        uncached = getattr(self.api, 'uncached', None)
+        if uncached is None:
+            return list(self.api.user_status(handle, **kwargs))
+        return uncached('user_status', handle, **kwargs)
+
+    def fetch_pages(self, handle, last_id):
+        if last_id == -1:
+            return RunTable.from_runs(self.user_status(handle))
+        new = {}
+        start = 1
+        while True:
+            page = self.user_status(handle, from_=start, count=self.page)
+            for run in page:
+                if run.id > last_id:
+                    new[run.id] = run
+            if len(page) < self.page or min(run.id for run in page) <= last_id:
+                break
+            start += self.page
+        return RunTable.from_runs(sorted(new.values(), key=lambda run: run.id, reverse=True))
+
+    def fetch_stream(self, handle, last_id):
+        self.requests += 1
+        return RunTable.from_json(self.stream.user_status(handle, verdicts=STREAMED_VERDICTS, after_id=last_id))
+
+    def refresh(self, handle):
+        runs = self.load(handle)
+        last_id = self.last_known_id(runs)
+
+        try:
+            if self.stream is not None:
+                table = self.fetch_stream(handle, last_id)
+            else:
+                table = self.fetch_pages(handle, last_id)
+        except OfflineCacheMiss:
+            if not os.path.exists(self.path(handle)):
+                raise
+            return runs
+        if len(table):
+            new = set(table.id)
+            table.extend(runs, (i for i in range(len(runs)) if runs.id[i] not in new and runs.id[i] <= last_id))
+            runs = table
+            self.save(handle, runs)
+        return runs
@@ -0,0 +1,137 @@
+from collections import namedtuple
+from datetime import datetime
+import random
+import time
+
+from codeforces import VerdictType
+from Ratings import Ratings
+
+Problem = namedtuple('Problem', 'contest_id index name tags')
+ProblemStatistics = namedtuple('ProblemStatistics', 'contest_id index solved_count')
+Contest = namedtuple('Contest', 'id name start_time duration')
+Submission = namedtuple('Submission', 'id contest_id problem creation_time verdict')
+User = namedtuple('User', 'handle rating')
+RatingChange = namedtuple('RatingChange', 'contest_id handle rating_update_time old_rating new_rating')
+
+START = "2015-01-05 00:00:00"
+CONTEST_GAP_S = 2 * 24 * 60 * 60
+DURATION_S = 2 * 60 * 60
+UPSOLVING_S = 60 * 24 * 60 * 60
+INDEXES = 'ABCDEF'
+TAGS = ('dp', 'greedy', 'math', 'graphs', 'strings', 'data structures')
+# Share of runs made on the newest tenth of the contests, the ones the reports look at
+RECENT_SHARE = 0.2
+ACCEPTED_SHARE = 0.4
+RATED_CONTESTS = 30
+
+
+class SyntheticCodeforcesAPI:
+    """In-process stand-in for CodeforcesAPI serving a generated cohort.
+
+    Every third pair of contests is a Div. 1/Div. 2 round held together, the
+    last four problems of the Div. 2 round are the first four of the Div. 1
+    one. Everything is derived from seed, the submissions of a handle are
+    generated when it is first asked for and only the last handle is kept.
+    generating_s is the time spent generating them, which is not the client's.
+    """
+
+    def __init__(self, users, contests, submissions, seed=0):
+        self.users = users
+        self.submissions = submissions
+        self.seed = seed
+        self.calls = 0
+        self.generating_s = 0.0
+        self.start = int(datetime.timestamp(datetime.fromisoformat(START)))
+        self.handles = ['user{:05d}'.format(i) for i in range(users)]
+
+        rnd = random.Random(seed)
+        self.contests = []
+        self.problems = []
+        self.ratings = {}
+        for i in range(contests):
+            contest_id = 1000 + i
+            start_time = self.start + (i - i % 2 if i % 6 < 2 else i) * CONTEST_GAP_S
+            if i % 6 == 0:
+                name, base = 'Codeforces Round #{} (Div. 1)'.format(contest_id), 1500
+            elif i % 6 == 1:
+                name, base = 'Codeforces Round #{} (Div. 2)'.format(contest_id - 1), 800
+            elif i % 3 == 0:
+                name, base = 'Codeforces Round #{} (Div. 3)'.format(contest_id), 800
+            else:
+                name, base = 'Educational Codeforces Round {} (Rated for Div. 2)'.format(contest_id), 800
+            self.contests.append(Contest(contest_id, name, start_time, DURATION_S))
+
+            for k, index in enumerate(INDEXES):
+                if i % 6 == 1 and k >= 2:
+                    problem_name = 'Problem {}{}'.format(contest_id - 1, INDEXES[k - 2])
+                else:
+                    problem_name = 'Problem {}{}'.format(contest_id, index)
+                self.problems.append(Problem(contest_id, index, problem_name, (rnd.choice(TAGS),)))
+                self.ratings['{}{}'.format(contest_id, index)] = min(3500, base + 300 * k + 100 * rnd.randint(-2, 2))
+
+        self.statistics = [ProblemStatistics(p.contest_id, p.index, rnd.randint(1, 20000)) for p in self.problems]
+        self.end = self.contests[-1].start_time + DURATION_S if self.contests else self.start
+        self._runs = (None, None)
+
+    def rating_table(self):
+        return Ratings(overrides=self.ratings)
+
+    def rating(self, handle):
+        return 1000 + random.Random('{}:{}'.format(self.seed, handle)).randint(0, 1800)
+
+    def runs(self, handle):
+        if self._runs[0] == handle:
+            return self._runs[1]
+
+        start = time.perf_counter()
+        rnd = random.Random('{}:{}'.format(self.seed, handle))
+        recent = len(self.contests) - len(self.contests) // 10
+        n = len(INDEXES)
+        times = []
+        for _ in range(self.submissions):
+            if rnd.random() < RECENT_SHARE:
+                i = rnd.randrange(recent * n, len(self.problems))
+            else:
+                i = rnd.randrange(len(self.problems))
+            contest = self.contests[i // n]
+            if rnd.random() < 0.5:
+                creation_time = contest.start_time + rnd.randrange(DURATION_S)
+            else:
+                creation_time = contest.start_time + DURATION_S + rnd.randrange(UPSOLVING_S)
+            verdict = VerdictType.ok if rnd.random() < ACCEPTED_SHARE else VerdictType.wrong_answer
+            times.append((creation_time, i, verdict))
+        times.sort(key=lambda t: (t[0], t[1]))
+
+        first_id = int(handle[len('user'):]) * 10 ** 6
+        runs = [Submission(first_id + k, self.problems[i].contest_id, self.problems[i], creation_time, verdict)
+                for k, (creation_time, i, verdict) in enumerate(times)]
+        runs.reverse()
+        self._runs = (handle, runs)
+        self.generating_s += time.perf_counter() - start
+        return runs
+
+    def contest_list(self, gym=False):
+        self.calls += 1
+        return map(lambda contest: contest, self.contests)
+
+    def problemset_problems(self, tags=None):
+        self.calls += 1
+        return {'problems': map(lambda problem: problem, self.problems),
+                'problemStatistics': map(lambda stat: stat, self.statistics)}
+
+    def user_info(self, handles):
+        self.calls += 1
+        return map(lambda handle: User(handle, self.rating(handle)), handles)
+
+    def user_rating(self, handle):
+        self.calls += 1
+        rating = self.rating(handle)
+        rated = self.contests[-RATED_CONTESTS:]
+        return map(lambda contest: RatingChange(contest.id, handle, contest.start_time + DURATION_S + 3600,
+                                                rating, rating), rated)
+
+    def user_status(self, handle, from_=1, count=None):
+        self.calls += 1
+        runs = self.runs(handle)
+        end = len(runs) if count is None else from_ - 1 + count
+        return map(lambda run: run, runs[from_ - 1:end])
@@ -4,19 +4,38 @@ from collections import defaultdict
 from itertools import groupby
 import sys
 import traceback
-import time
 
-from datetime import datetime
-from codeforces import CodeforcesAPI
 from codeforces import VerdictType
 from codeforces import Problem
 from codeforces import Contest
+from Batch import select_problems
+from Cassette import cached_transport
+from Catalogue import Catalogue
+from Catalogue import filter_unsolved
+from Catalogue import rank_hardest
+from Catalogue import filter_week
+from Catalogue import sort_by_name
+from Catalogue import load_twins
+from Dataset import Dataset
+from Instrument import call_profiled
+from Instrument import profile
+from Leaderboard import publish_leaderboards
+from Parallel import configure
+from Parallel import workers
+from Report import ShardedReport
+from Report import digest
+from Report import make_record
+from Season import Season
+from Stream import streaming
+from SubmissionLog import SubmissionLog
+from Upsolving import Candidates
+from Users import get_users
 
 C_HARD = 1.3
 C_EASY = 0.8
 MAX_CNT = 5
 
-WEEK_S = 7 * 24 * 60 * 60
+SEASON = Season("2019-11-11 00:00:00", 1)
 
 
 def first_or_default(lst, f):
@@ -41,168 +60,82 @@ def group_by_contest_id(iterable):
     return res
 
 
-def make_url(problem):
-    s = 'http://codeforces.com/contest/{}/problem/{}'.format(problem.contest_id, problem.index)
-    return '<a href =\"'+s+'\">'+s+'</a><br>'
-
-
 def filter_accepted(iterable):
     return filter(lambda submission: submission.verdict is not None and submission.verdict == VerdictType.ok, iterable)
 
 
-def filter_week(iterable, contests_ids):
-    return filter(lambda problem: problem.contest_id in contests_ids, iterable)
-
-
-def solved_in_div2(problem, solved):
-    for ok in solved:
-        if (abs(int(problem.contest_id) - int(ok.contest_id)) < 10) and (problem.name == ok.name):
-            return True
-    return False
-
-
-def filter_solved_in_div2(iterable, solved):
-    return filter(lambda problem: not solved_in_div2(problem, solved), iterable)
-
-
-def filter_difficult(iterable, difficulty, max_d):
-    return filter(lambda problem: difficulty['{}{}'.format(problem.contest_id, problem.index)] <= max_d, iterable)
-
-
-def filter_easy(iterable, difficulty, min_d):
-    return filter(lambda problem: (difficulty['{}{}'.format(problem.contest_id, problem.index)] >= min_d), iterable)
+def get_problems_for_user(dataset, user, window, catalogue):
+    index = dataset.run_index(user.handle, catalogue)
+    ends = dataset.contest_ends()
 
+    ranked = rank_hardest(window, catalogue)
+    upsolved = set(i for i in ranked if index.upsolved(i, ends[catalogue.problems[i].contest_id]))
+    unsolved = set(filter_unsolved(ranked, catalogue, index))
+    return Candidates(ranked, upsolved, unsolved)
 
-def filter_CNT_problems_with_max_diff(iterable, difficulty, cnt):
-    problems = list(iterable)
-    if len(problems) <= cnt:
-        return problems
-    sorted_problems = sorted(problems, key=lambda problem: difficulty['{}{}'.format(problem.contest_id, problem.index)],
-                             reverse=True)
-    return sorted_problems[0:cnt]
 
+def print_list_of_problems_to_files(dataset, users, catalogue, windows, candidates, file, cnt):
+    report = ShardedReport(file, dataset.warehouse)
 
-def get_users(api):
-    f = open('participants.txt', 'r')
-    handles = []
-    for line in f:
-        handles.append(line)
-    # handles = ['DanShaders']
-
-    users = []
-    for handle in handles:
-        for u in api.user_info([handle]):
-            users.append(u)
-        time.sleep(0.5)
-
-    return users
-
-
-def get_difficult():
-    f = open('problems.txt', 'r')
-    res = {}
-    for line in f:
-        s = line.split()
-        res[s[0]] = int(s[len(s) - 2])
-    return res
-
-
-def cnt_upsolving(runs, problems, id2contest, difficulty):
-    res = 0
-    for problem in problems:
-        # print(problem, difficulty['{}{}'.format(problem.contest_id, problem.index)])
-        solved_in_contest = False
-        for run in runs:
-            if (run.problem.name == problem.name) and \
-                    (run.creation_time <= id2contest[problem.contest_id].start_time + id2contest[problem.contest_id].duration):
-                solved_in_contest = True
-                break
-
-        if solved_in_contest:
+    stale = []
+    for user, window in zip(users, windows):
+        try:
+            key = digest(([catalogue.twin_keys(i) for i in window], dataset.state(user.handle)))
+        except Exception as e:
+            report.fail(user.handle, e)
             continue
-
-        for run in runs:
-            if (run.problem.name == problem.name) and \
-                    (run.creation_time > id2contest[problem.contest_id].start_time + id2contest[problem.contest_id].duration):
-                res += 1
-                break
-    return res
-
-
-def get_problems_for_user(api, user, rating, contest_ids, id2contest, difficulties, cnt):
-    problems = api.problemset_problems()['problems']
-    problems = filter_week(problems, contest_ids)
-
-    runs = filter_accepted(api.user_status(user.handle))
-    solved = set(run.problem for run in runs)
-    ok = set(filter_accepted(api.user_status(user.handle)))
-
-    to_solve = filter_difficult(problems, difficulties, rating * C_HARD)
-    to_solve = filter_easy(to_solve, difficulties, rating * C_EASY)
-
-    if cnt != -1:
-        to_solve = filter_CNT_problems_with_max_diff(to_solve, difficulties, cnt)
-    prob = set(to_solve)
-
-    ok_ups = cnt_upsolving(ok, prob, id2contest, difficulties)
-    to_solve = filter(lambda p: p not in solved, prob)
-    to_solve = filter_solved_in_div2(to_solve, solved)
-    return ok_ups, to_solve
-
-
-def print_list_of_problems_to_files(api, users, difficulties, week, handle2rating, file, cnt):
-    sys.stdout = open(file, 'wt')
-    ts = datetime.now().timestamp()
-    print("Last time updated: ", datetime.fromtimestamp(ts), "\n")
-
-    week_start = datetime.fromtimestamp(
-        datetime.timestamp(datetime.fromisoformat("2019-11-11 00:00:00")) + WEEK_S * week)
-    week_end = datetime.fromtimestamp(datetime.timestamp(week_start) + WEEK_S)
-
-    contests = api.contest_list()
-    contests_week = filter(lambda s: (s.start_time > datetime.timestamp(week_start)) and
-                                     (s.start_time < datetime.timestamp(week_end)), contests)
-
-    id2contest = {}
-    for contest in contests_week:
-        id2contest[get_contest_id(contest)] = contest
-
-    contests_week = id2contest.values()
-
-    contest_ids = set(contest.id for contest in contests_week)
-    for user in users:
-        ok_ups, to_solve = get_problems_for_user(api, user, handle2rating[user.handle], contest_ids, id2contest,
-                                                 difficulties, cnt)
-
-        should = list(to_solve)
-        should = sorted(should, key=lambda problem: '{}{}'.format(problem.contest_id, problem.index))
-        print("-----", user.handle, "{}/{}-----<br>".format(ok_ups, ok_ups + len(should)))
-        for p in should:
-            print(make_url(p))
-
-
-def print_for_users(api, users, difficulties, week, handle2rating):
-    print_list_of_problems_to_files(api, users, difficulties, week, handle2rating,  'tmp.' + str(week + 1) + '.html', MAX_CNT)
-    print_list_of_problems_to_files(api, users, difficulties, week, handle2rating, 'all.' + str(week + 1) + '.html', -1)
-
-
-def load_ratings_from_file(file):
-    f = open(file, 'r')
-    handle2rating = {}
-
-    for line in f:
-        s = line.split()
-        handle2rating[s[0]] = int(s[1])
-    return handle2rating
+        if not report.fresh(user.handle, key):
+            stale.append((user, window, key))
+
+    missing = [(dataset, user, window, catalogue) for user, window, key in stale if user.handle not in candidates]
+    # Evaluations arrive in the order of missing, every shard is written as soon as its user is done
+    evaluated = zip(missing, workers.timed_map(get_problems_for_user, missing))
+    for user, window, key in stale:
+        if user.handle not in candidates:
+            (_, done, _, _), (candidates[user.handle], elapsed) = next(evaluated)
+            profile.add('evaluate', elapsed, user=done.handle)
+        ok_ups, to_solve = candidates[user.handle].view(cnt)
+        should = sort_by_name(to_solve, catalogue)
+        report.update(user.handle, key, make_record(user.handle, ok_ups, [catalogue.problems[p] for p in should]))
+    report.publish([user.handle for user in users])
+
+
+def print_for_users(dataset, users, catalogue, week, id2contest, handle2rating):
+    problems = filter_week(catalogue, set(id2contest))
+    windows = select_problems(catalogue, problems, [handle2rating[user.handle] for user in users], C_EASY, C_HARD, -1)
+
+    # Both lists are cut from one evaluation of every user
+    candidates = {}
+    print_list_of_problems_to_files(dataset, users, catalogue, windows, candidates, 'tmp.' + str(week + 1) + '.html', MAX_CNT)
+    print_list_of_problems_to_files(dataset, users, catalogue, windows, candidates, 'all.' + str(week + 1) + '.html', -1)
+
+
+def run(dataset, users, catalogue):
+    dataset.warehouse.store_problems(catalogue)
+    weeks = SEASON.split(dataset.contests())
+    # Workers are forked once, with the submissions of every user read and indexed
+    with workers.sharing(dataset, catalogue,
+                         before_fork=lambda: dataset.prepare((user.handle for user in users), catalogue)):
+        for week in SEASON.active_weeks():
+            with profile.stage('week', week):
+                handle2rating = dataset.ratings_at(users, SEASON.bounds(week)[0])
+                print_for_users(dataset, users, catalogue, week, weeks[week], handle2rating)
+    publish_leaderboards(dataset.warehouse)
 
 
 def main():
-    api = CodeforcesAPI()
+    configure(sys.argv[1:])
+    api = cached_transport(sys.argv[1:], offline='--offline' in sys.argv, resume='--resume' in sys.argv)
+    dataset = Dataset(api, log=SubmissionLog(api, stream=streaming(sys.argv[1:])))
 
     users = get_users(api)
-    diff = get_difficult()
-    for week in range(1):
-        print_for_users(api, users, diff, week, load_ratings_from_file('rating' + str(week + 1) + '.txt'))
+    with profile.stage('catalogue'):
+        catalogue = Catalogue(dataset.problems(), dataset.problem_statistics(), dataset.ratings(),
+                              dataset.contests(), load_twins())
+    call_profiled('--cprofile' in sys.argv, run, dataset, users, catalogue)
+    print(dataset.report(), file=sys.stderr)
+    print(api.report(), file=sys.stderr)
+    profile.write()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,54 @@
+class RunIndex:
+    """Accepted runs of one user indexed by the twin class of their problem.
+
+    Built in a single pass over the accepted rows of a RunTable, after that
+    every question about problem i of the catalogue is a lookup of the class
+    catalogue.twin[i], so a run in either division answers for both. Runs of
+    problems the catalogue does not know solve nothing in it.
+    """
+
+    def __init__(self, runs, catalogue):
+        self.twin = catalogue.twin
+        self.accept_time = {}
+
+        times = runs.time
+        for i in runs.accepted():
+            contest_id, index, name = runs.key(i)
+            problem = catalogue.ids.get((contest_id, index))
+            if problem is None:
+                continue
+            twin = self.twin[problem]
+            # The earliest accepted run of the class decides whether it was upsolved
+            if twin not in self.accept_time or times[i] < self.accept_time[twin]:
+                self.accept_time[twin] = times[i]
+
+    def solved(self, i):
+        return self.twin[i] in self.accept_time
+
+    def upsolved(self, i, end):
+        time = self.accept_time.get(self.twin[i])
+        return time is not None and time > end
+
+
+def contest_ends(contests):
+    return {contest.id: contest.start_time + contest.duration for contest in contests}
+
+
+def cnt_upsolving(index, ids, catalogue, ends):
+    return sum(1 for i in ids if index.upsolved(i, ends[catalogue.problems[i].contest_id]))
+
+
+class Candidates:
+    """Problems of a user's window ranked hardest first, with what the user did to them.
+
+    Lists capped at any number of problems are cheap views of the same evaluation.
+    """
+
+    def __init__(self, ranked, upsolved, unsolved):
+        self.ranked = ranked
+        self.upsolved = upsolved
+        self.unsolved = unsolved
+
+    def view(self, cnt):
+        top = self.ranked if cnt == -1 else self.ranked[:cnt]
+        return sum(1 for i in top if i in self.upsolved), [i for i in top if i in self.unsolved]
@@ -0,0 +1,61 @@
+import sys
+
+from Instrument import profile
+
+# Maximal number of handles user.info accepts in one request
+USER_INFO_LIMIT = 10000
+# Start of the comment user.info fails with when one of the handles does not exist
+UNKNOWN_HANDLE = 'User with handle'
+
+
+def read_handles(file):
+    handles = []
+    seen = set()
+    with open(file, 'r') as f:
+        for line in f:
+            handle = line.strip()
+            # Codeforces handles are case-insensitive
+            if handle and handle.lower() not in seen:
+                seen.add(handle.lower())
+                handles.append(handle)
+    return handles
+
+
+def fetch_users(api, handles):
+    try:
+        return list(api.user_info(handles))
+    except Exception as e:
+        # Anything but an unknown handle fails every part of the chunk as well
+        if UNKNOWN_HANDLE not in str(e):
+            raise
+        if len(handles) == 1:
+            print('Skipping handle', handles[0] + ':', e, file=sys.stderr)
+            return []
+        # Split the chunk until the handle the whole request fails on is found
+        mid = len(handles) // 2
+        return fetch_users(api, handles[:mid]) + fetch_users(api, handles[mid:])
+
+
+def merge_handles(lists):
+    """Handles of all lists, each once, in the order they first appear."""
+    handles = []
+    seen = set()
+    for lst in lists:
+        for handle in lst:
+            if handle.lower() not in seen:
+                seen.add(handle.lower())
+                handles.append(handle)
+    return handles
+
+
+def get_users(api, file='participants.txt'):
+    return get_users_by_handles(api, read_handles(file))
+
+
+def get_users_by_handles(api, handles):
+    users = []
+    with profile.stage('get_users'):
+        for i in range(0, len(handles), USER_INFO_LIMIT):
+            users.extend(fetch_users(api, handles[i:i + USER_INFO_LIMIT]))
+
+    return users
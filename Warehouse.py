@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+
+import sqlite3
+import sys
+import time
+import traceback
+
+from Report import board_week
+from Report import digest
+from Season import Season
+
+DATABASE = 'warehouse.sqlite'
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS contests (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    start_time INTEGER,
+    duration INTEGER
+);
+CREATE INDEX IF NOT EXISTS contests_start_time ON contests (start_time);
+
+CREATE TABLE IF NOT EXISTS problems (
+    contest_id INTEGER,
+    idx TEXT,
+    name TEXT,
+    rating INTEGER,
+    solved_count INTEGER,
+    PRIMARY KEY (contest_id, idx)
+);
+CREATE INDEX IF NOT EXISTS problems_rating ON problems (rating);
+
+CREATE TABLE IF NOT EXISTS twins (
+    contest_id INTEGER,
+    idx TEXT,
+    twin_contest_id INTEGER,
+    twin_idx TEXT,
+    PRIMARY KEY (contest_id, idx)
+);
+CREATE INDEX IF NOT EXISTS twins_class ON twins (twin_contest_id, twin_idx);
+
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY,
+    handle TEXT,
+    contest_id INTEGER,
+    problem_index TEXT,
+    problem_name TEXT,
+    creation_time INTEGER,
+    verdict TEXT
+);
+CREATE INDEX IF NOT EXISTS submissions_problem ON submissions (handle, contest_id, problem_index, creation_time);
+-- Served the twin matching by name, which twins replaced
+DROP INDEX IF EXISTS submissions_name;
+
+CREATE TABLE IF NOT EXISTS assignments (
+    report TEXT,
+    handle TEXT,
+    contest_id INTEGER,
+    problem_index TEXT,
+    upsolved INTEGER,
+    assigned INTEGER,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS assignments_report ON assignments (report, handle);
+
+CREATE TABLE IF NOT EXISTS versions (
+    name TEXT PRIMARY KEY,
+    digest TEXT
+);
+
+CREATE TABLE IF NOT EXISTS cells (
+    board TEXT,
+    handle TEXT,
+    week INTEGER,
+    upsolved INTEGER,
+    assigned INTEGER,
+    PRIMARY KEY (board, handle, week)
+);
+
+CREATE TABLE IF NOT EXISTS standings (
+    board TEXT,
+    handle TEXT,
+    upsolved INTEGER,
+    assigned INTEGER,
+    weeks INTEGER,
+    completed INTEGER,
+    streak INTEGER,
+    best_streak INTEGER,
+    PRIMARY KEY (board, handle)
+);
+'''
+
+OK = 'ok'
+
+
+def completed(upsolved, assigned):
+    """Whether a week counts for a streak: everything assigned was upsolved."""
+    return assigned > 0 and upsolved == assigned
+
+
+class Warehouse:
+    """SQLite copy of the contests, problems and submissions a run worked with.
+
+    Also keeps the latest assignment of every user in every report, and the
+    season standings of every board, the reports of the weeks of one file
+    prefix: a cell per user and week plus running totals per user, which a
+    changed assignment moves by the difference. Contests and problems are
+    rewritten only when they differ from the stored ones. week_problems and
+    cnt_upsolving recompute a cell of a report for the command line, straight
+    from the indexes, without downloading anything.
+    """
+
+    def __init__(self, file=DATABASE):
+        self.db = sqlite3.connect(file)
+        self.db.executescript(SCHEMA)
+        # Boards whose standings changed since they were last published
+        self.changed = set()
+
+    def close(self):
+        self.db.close()
+
+    def new_version(self, name, value):
+        """Digest of value, None when value is what was last stored as name and nothing needs rewriting."""
+        version = digest(value)
+        row = self.db.execute('SELECT digest FROM versions WHERE name = ?', (name,)).fetchone()
+        if row is not None and row[0] == version:
+            return None
+        return version
+
+    def store_contests(self, contests):
+        rows = [(c.id, c.name, c.start_time, c.duration) for c in contests]
+        version = self.new_version('contests', rows)
+        if version is None:
+            return
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO contests VALUES (?, ?, ?, ?)', rows)
+            self.db.execute('INSERT OR REPLACE INTO versions VALUES (?, ?)', ('contests', version))
+
+    def store_problems(self, catalogue):
+        version = self.new_version('problems', (
+            catalogue.keys, [problem.name for problem in catalogue.problems], list(catalogue.rating),
+            list(catalogue.solved_count), list(catalogue.twin)))
+        if version is None:
+            return
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO versions VALUES (?, ?)', ('problems', version))
+            self.db.executemany('INSERT OR REPLACE INTO problems VALUES (?, ?, ?, ?, ?)',
+                                ((catalogue.problems[i].contest_id, catalogue.index[i], catalogue.problems[i].name,
+                                  catalogue.rating[i], catalogue.solved_count[i]) for i in range(len(catalogue))))
+            self.db.executemany('INSERT OR REPLACE INTO twins VALUES (?, ?, ?, ?)',
+                                (catalogue.keys[i] + catalogue.keys[catalogue.twin[i]] for i in range(len(catalogue))))
+
+    def store_submissions(self, handle, runs):
+        """Adds the rows of the RunTable newer than the stored ones and rewrites the ones still being judged."""
+        last_id, = self.db.execute('SELECT COALESCE(MAX(id), -1) FROM submissions WHERE handle = ?',
+                                   (handle,)).fetchone()
+        pending = set(row[0] for row in self.db.execute(
+            "SELECT id FROM submissions WHERE handle = ? AND (verdict IS NULL OR verdict = 'testing')", (handle,)))
+
+        with self.db:
+            self.db.executemany('INSERT OR REPLACE INTO submissions VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                ((runs.id[i], handle) + runs.key(i) + (runs.time[i], runs.verdict_name(i))
+                                 for i in range(len(runs)) if runs.id[i] > last_id or runs.id[i] in pending))
+
+    def store_assignment(self, report, record):
+        with self.db:
+            self.db.execute('DELETE FROM assignments WHERE report = ? AND handle = ?', (report, record['handle']))
+            self.db.executemany('INSERT INTO assignments VALUES (?, ?, ?, ?, ?, ?, ?)',
+                                ((report, record['handle'], problem['contest_id'], problem['index'],
+                                  record['upsolved'], record['assigned'], time.time())
+                                 for problem in record['problems']))
+        board = board_week(report)
+        if board is not None and record.get('error') is None:
+            self.store_cell(board[0], board[1], record['handle'], record['upsolved'], record['assigned'])
+
+    def store_cell(self, board, week, handle, upsolved, assigned):
+        """Sets the cell of handle in week of board, the standings of handle follow it."""
+        old = self.db.execute('SELECT upsolved, assigned FROM cells WHERE board = ? AND handle = ? AND week = ?',
+                              (board, handle, week)).fetchone()
+        if old == (upsolved, assigned):
+            return
+        old_upsolved, old_assigned = old or (0, 0)
+
+        with self.db:
+            self.db.execute('INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?)',
+                            (board, handle, week, upsolved, assigned))
+            self.db.execute('INSERT OR IGNORE INTO standings VALUES (?, ?, 0, 0, 0, 0, 0, 0)', (board, handle))
+            self.db.execute('UPDATE standings SET upsolved = upsolved + ?, assigned = assigned + ?, '
+                            'weeks = weeks + ?, completed = completed + ? WHERE board = ? AND handle = ?',
+                            (upsolved - old_upsolved, assigned - old_assigned, old is None,
+                             completed(upsolved, assigned) - (old is not None and completed(*old)), board, handle))
+            # Streaks depend on the order of the weeks, only the weeks of this handle are read again
+            streak = best = 0
+            for cell in self.db.execute('SELECT upsolved, assigned FROM cells WHERE board = ? AND handle = ? '
+                                        'ORDER BY week', (board, handle)):
+                streak = streak + 1 if completed(*cell) else 0
+                best = max(best, streak)
+            self.db.execute('UPDATE standings SET streak = ?, best_streak = ? WHERE board = ? AND handle = ?',
+                            (streak, best, board, handle))
+        self.changed.add(board)
+
+    def boards(self):
+        return [row[0] for row in self.db.execute('SELECT DISTINCT board FROM standings ORDER BY board')]
+
+    def standings(self, board):
+        """Standings of board, best first: by upsolved problems, completion rate and the longest streak."""
+        return self.db.execute('SELECT handle, upsolved, assigned, weeks, completed, streak, best_streak '
+                               'FROM standings WHERE board = ? ORDER BY upsolved DESC, '
+                               'CAST(upsolved AS REAL) / MAX(assigned, 1) DESC, best_streak DESC, handle',
+                               (board,)).fetchall()
+
+    def week_problems(self, week_start, week_end, min_d, max_d):
+        """Problems of the week's contests with min_d <= rating <= max_d, what filter_week with both
+        difficulty filters selects."""
+        return self.db.execute('SELECT p.contest_id, p.idx FROM contests c JOIN problems p ON p.contest_id = c.id '
+                               'WHERE c.start_time > ? AND c.start_time < ? AND p.rating BETWEEN ? AND ? '
+                               'ORDER BY p.contest_id, p.idx',
+                               (week_start, week_end, min_d, max_d)).fetchall()
+
+    def cnt_upsolving(self, handle, problems):
+        """How many of the (contest_id, index) problems handle solved only after their contest ended.
+
+        Runs of any problem of the twin class count, like in Upsolving.RunIndex.
+        """
+        count = 0
+        for contest_id, index in problems:
+            row = self.db.execute(
+                'SELECT MIN(s.creation_time) > c.start_time + c.duration '
+                'FROM twins t JOIN contests c ON c.id = t.contest_id '
+                'JOIN twins u ON u.twin_contest_id = t.twin_contest_id AND u.twin_idx = t.twin_idx '
+                'JOIN submissions s ON s.handle = ? AND s.contest_id = u.contest_id AND s.problem_index = u.idx '
+                'AND s.verdict = ? '
+                'WHERE t.contest_id = ? AND t.idx = ?', (handle, OK, contest_id, index)).fetchone()
+            count += bool(row[0])
+        return count
+
+
+def main():
+    # Warehouse.py <season start> <week> <handle> <rating> [c_easy c_hard]: one cell recomputed from local data
+    start, week, handle, rating = sys.argv[1], int(sys.argv[2]), sys.argv[3], int(sys.argv[4])
+    c_easy, c_hard = (float(sys.argv[5]), float(sys.argv[6])) if len(sys.argv) > 6 else (0.8, 1.3)
+
+    week_start, week_end = Season(start, week + 1).bounds(week)
+    warehouse = Warehouse()
+    problems = warehouse.week_problems(week_start, week_end, rating * c_easy, rating * c_hard)
+    print(handle, '{}/{}'.format(warehouse.cnt_upsolving(handle, problems), len(problems)))
+    for contest_id, index in problems:
+        print('{}{}'.format(contest_id, index))
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except:
+        traceback.print_exc()
+        sys.exit(1)
@@ -1,22 +1,17 @@
 :start
-	python Second.py
-	if NOT ERRORLEVEL 1 (
-		del codeforces-upsolving1.html
-		rename tmp.1.html codeforces-upsolving1.html
-		del codeforces-upsolving2.html
-		rename tmp.2.html codeforces-upsolving2.html	
-		del codeforces-upsolving3.html
-		rename tmp.3.html codeforces-upsolving3.html	
-		del codeforces-upsolving4.html
-		rename tmp.4.html codeforces-upsolving4.html	
-rem		del codeforces-upsolving5.html
-rem		rename tmp.5.html codeforces-upsolving5.html	
-		del codeforces-upsolving6.html
-		rename tmp.6.html codeforces-upsolving6.html	
-		del codeforces-upsolving7.html
-		rename tmp.7.html codeforces-upsolving7.html	
-		del codeforces-upsolving8.html
-		rename tmp.8.html codeforces-upsolving8.html	
+	python Second.py %RESUME%
+	if ERRORLEVEL 1 (
+		set RESUME=--resume
+	) else (
+		set RESUME=
+		if exist tmp.1.html (del codeforces-upsolving1.html & rename tmp.1.html codeforces-upsolving1.html)
+		if exist tmp.2.html (del codeforces-upsolving2.html & rename tmp.2.html codeforces-upsolving2.html)
+		if exist tmp.3.html (del codeforces-upsolving3.html & rename tmp.3.html codeforces-upsolving3.html)
+		if exist tmp.4.html (del codeforces-upsolving4.html & rename tmp.4.html codeforces-upsolving4.html)
+rem		if exist tmp.5.html (del codeforces-upsolving5.html & rename tmp.5.html codeforces-upsolving5.html)
+		if exist tmp.6.html (del codeforces-upsolving6.html & rename tmp.6.html codeforces-upsolving6.html)
+		if exist tmp.7.html (del codeforces-upsolving7.html & rename tmp.7.html codeforces-upsolving7.html)
+		if exist tmp.8.html (del codeforces-upsolving8.html & rename tmp.8.html codeforces-upsolving8.html)
 	)
 	
 rem	ping localhost -n 60 > null
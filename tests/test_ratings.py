@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import Ratings
+from Catalogue import NO_RATING
+
+
+def problem(contest_id, index, rating):
+    return {'contestId': contest_id, 'index': index, 'rating': rating}
+
+
+def statistic(contest_id, index, solved_count):
+    return {'contestId': contest_id, 'index': index, 'solvedCount': solved_count}
+
+
+class LoadRatingsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.snapshot = os.path.join(self.dir.name, 'catalogue.bin')
+        self.overrides = os.path.join(self.dir.name, 'problems.txt')
+        Ratings.write_snapshot([problem(1200, 'A', 800)], [statistic(1200, 'A', 10)], file=self.snapshot)
+        self.problemset = ([problem(1200, 'A', 800), problem(1300, 'A', 1500)],
+                           [statistic(1200, 'A', 10), statistic(1300, 'A', 5)])
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def load(self, problems, rebuild=True):
+        with mock.patch.object(Ratings, 'fetch_problemset', return_value=self.problemset) as fetch:
+            ratings = Ratings.load_ratings(self.snapshot, self.overrides, problems, rebuild)
+        self.addCleanup(ratings.snapshot.close)
+        return ratings, fetch.call_count
+
+    def test_rebuilds_for_unknown_problem(self):
+        ratings, fetched = self.load([SimpleNamespace(contest_id=1300, index='A')])
+        self.assertEqual(fetched, 1)
+        self.assertEqual(ratings.rating(1300, 'A'), 1500)
+        self.assertEqual(len(ratings.snapshot), 2)
+
+    def test_rebuilds_expired_snapshot(self):
+        with mock.patch.object(time, 'time', return_value=time.time() + Ratings.TTL['problemset_problems'] + 1):
+            ratings, fetched = self.load([])
+        self.assertEqual(fetched, 1)
+        self.assertEqual(ratings.rating(1300, 'A'), 1500)
+
+    def test_keeps_fresh_snapshot(self):
+        ratings, fetched = self.load([SimpleNamespace(contest_id=1200, index='A')])
+        self.assertEqual(fetched, 0)
+        self.assertEqual(ratings.rating(1300, 'A'), NO_RATING)
+
+    def test_no_rebuild_offline(self):
+        ratings, fetched = self.load([SimpleNamespace(contest_id=1300, index='A')], rebuild=False)
+        self.assertEqual(fetched, 0)
+        self.assertEqual(ratings.rating(1300, 'A'), NO_RATING)
+
+
+if __name__ == '__main__':
+    unittest.main()